@@ -0,0 +1,117 @@
+"""Time exact arithmetic with gmpy2's mpq and with Fraction.
+
+The rationals used internally are :class:`gmpy2.mpq` if gmpy2 is installed,
+and :class:`fractions.Fraction` otherwise (see :mod:`murasyp`). Run from the
+root of the repository::
+
+  python benchmarks/rationals.py
+
+Each workload is run in a subprocess for each number type, with gmpy2 made
+unimportable for the Fraction run, and the time taken is printed:
+
+``credalset``
+  lower expectations of gambles for a credal set, calculated on its
+  extreme points by exact arithmetic
+``maximize``
+  lower expectations of gambles for a set of desirable gambles, each a
+  linear program solved by :func:`murasyp.mathprog.maximize`, in which the
+  arithmetic is mostly done by cddlib
+
+The models and gambles are random, but the same for both number types.
+
+"""
+
+import argparse
+import os
+import random
+import subprocess
+import sys
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _mass_function(rng, states):
+    masses = [rng.randint(0, 100) for x in states]
+    masses[rng.randrange(len(states))] += 1 # a non-zero total mass
+    return dict(zip(states, masses))
+
+def _gamble(rng, states):
+    from murasyp.gambles import Gamble
+    return Gamble({x: rng.randint(-100, 100) for x in states})
+
+def credalset(rng, states, size, count):
+    """Lower expectations for a credal set of `size` mass functions"""
+    from murasyp.credalsets import CredalSet
+    K = CredalSet([_mass_function(rng, states) for i in range(size)])
+    gambles = [_gamble(rng, states) for i in range(count)]
+    start = time.time()
+    for f in gambles:
+        K * f
+    return time.time() - start
+
+def maximize(rng, states, size, count):
+    """Lower expectations for a set of desirable gambles assessing `size`
+    lower probabilities"""
+    from fractions import Fraction
+    from murasyp.desirs import DesirSet
+    D = DesirSet([states])
+    for i in range(size):
+        event = rng.sample(states, rng.randint(1, len(states) - 1))
+        D.set_lower_pr({x: int(x in event) for x in states},
+                       Fraction(rng.randint(0, 50), 100))
+    gambles = [_gamble(rng, states) for i in range(count)]
+    start = time.time()
+    for f in gambles:
+        D * f
+    return time.time() - start
+
+workloads = [('credalset', credalset, 200, 100),
+             ('maximize', maximize, 10, 30)]
+
+def _run(arguments):
+    """Time a workload in this process, with the given number type"""
+    if arguments.number_type == 'Fraction':
+        sys.modules['gmpy2'] = None # makes importing gmpy2 fail
+    sys.path.insert(0, root)
+    import murasyp
+    assert murasyp._Rational.__name__ == arguments.number_type
+    for name, workload, size, count in workloads:
+        if name == arguments.workload:
+            rng = random.Random(arguments.seed)
+            states = [chr(ord('a') + i) for i in range(arguments.states)]
+            print workload(rng, states, size, count)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--states', type=int, default=10,
+                        help="the number of states")
+    parser.add_argument('--seed', type=int, default=0,
+                        help="the seed of the random models and gambles")
+    parser.add_argument('--workload', help=argparse.SUPPRESS)
+    parser.add_argument('--number-type', help=argparse.SUPPRESS)
+    arguments = parser.parse_args()
+    if arguments.workload is not None:
+        return _run(arguments)
+    print "%-10s %8s %10s %10s %8s" % ('workload', 'size', 'mpq', 'Fraction',
+                                       'speedup')
+    for name, workload, size, count in workloads:
+        times = {}
+        for number_type in ['mpq', 'Fraction']:
+            try:
+                times[number_type] = float(subprocess.check_output(
+                    [sys.executable, __file__, '--workload', name,
+                     '--number-type', number_type,
+                     '--states', str(arguments.states),
+                     '--seed', str(arguments.seed)]))
+            except subprocess.CalledProcessError: # e.g., no gmpy2
+                times[number_type] = None
+        row = [name, '%dx%d' % (count, size)]
+        for number_type in ['mpq', 'Fraction']:
+            row.append('-' if times[number_type] is None
+                           else '%.2f s' % times[number_type])
+        row.append('-' if None in times.values()
+                       else '%.1fx' % (times['Fraction'] / times['mpq']))
+        print "%-10s %8s %10s %10s %8s" % tuple(row)
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,48 @@ __version__ = '(git)'
 __release__ = __version__
 
 from fractions import Fraction
+try:
+    from gmpy2 import mpq as _Rational # exact type used internally, if present
+except ImportError:
+    _Rational = Fraction
 
 def _make_rational(value):
-    """Make a Fraction of acceptable input"""
+    """Make a rational of acceptable input"""
+    if type(value) is _Rational:
+        return value
+    elif type(value) in (int, long):
+        return _Rational(value)
+    elif type(value) is Fraction:
+        return _Rational(value.numerator, value.denominator)
     try:
-        return Fraction(str(value)) # avoid float to Fraction by going to string
+        value = Fraction(str(value)) # avoid float to Fraction by going to string
     except ValueError:
         print(repr(value) + " is not a Rational number")
+    else:
+        return (value if _Rational is Fraction
+                      else _Rational(value.numerator, value.denominator))
+
+def _canonical_rational(numerator, denominator):
+    """Make a rational of a numerator and positive denominator that are known
+    to be coprime, skipping the normalization if possible"""
+    if _Rational is Fraction:
+        return _canonical_fraction(numerator, denominator)
+    else:
+        return _Rational(numerator, denominator)
+
+def _canonical_fraction(numerator, denominator):
+    """Make a Fraction of a numerator and positive denominator that are known
+    to be coprime, skipping the normalization"""
+    value = object.__new__(Fraction)
+    value._numerator = numerator
+    value._denominator = denominator
+    return value
+
+def _as_fraction(value):
+    """Convert an internally used rational to a Fraction, which is what is
+    handed out"""
+    if type(value) is _Rational and _Rational is not Fraction:
+        return _canonical_fraction(int(value.numerator),
+                                   int(value.denominator))
+    else:
+        return value
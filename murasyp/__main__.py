@@ -0,0 +1,6 @@
+"""Run the command-line interface, see :mod:`murasyp.cli`"""
+
+import sys
+from murasyp.cli import main
+
+sys.exit(main())
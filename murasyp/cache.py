@@ -0,0 +1,212 @@
+"""Results of expensive calculations can be kept in a cache directory.
+
+Vertex/facet enumerations (see :func:`~murasyp.mathprog.vf_enumeration`, used
+by :meth:`~murasyp.desirs.DesirSet.get_credal` and
+:meth:`~murasyp.credalsets.CredalSet.get_desir`) and lower and upper
+expectations of :class:`~murasyp.desirs.DesirSet` are looked up in and stored
+into :data:`default_cache` if it is set, so that they are shared between the
+processes and runs that use the same cache directory.
+
+>>> import shutil, tempfile, murasyp.cache
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.desirs import DesirSet
+>>> directory = tempfile.mkdtemp()
+>>> murasyp.cache.default_cache = DiskCache(directory)
+>>> D = DesirSet(['abc'])
+>>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+>>> D * Gamble({'a': 1, 'b': 0, 'c': 1})
+Fraction(1, 2)
+>>> murasyp.cache.default_cache.entries()
+1
+>>> DesirSet(D) * Gamble({'a': 1, 'b': 0, 'c': 1}) # looked up
+Fraction(1, 2)
+>>> murasyp.cache.default_cache = None
+>>> shutil.rmtree(directory)
+
+Entries are keyed by a hash of a canonical form of the model or polytope, the
+query and the backend, so equal models give the same keys, whichever process
+created them.
+
+"""
+
+import errno
+import hashlib
+import os
+import tempfile
+import zlib
+import cPickle as pickle
+from collections import Set
+from murasyp.vectors import Vector
+
+default_cache = None # the DiskCache that is used, if any
+
+class DiskCache(object):
+    """A size-bounded cache of results in a directory
+
+      :arg `directory`: the directory, which is created if needed
+      :type `directory`: :class:`str`
+      :arg `max_bytes`: the total size of the entries above which the least
+        recently used ones are removed
+      :type `max_bytes`: :class:`int`
+
+    Each entry is a file containing a compressed pickle, named after its key.
+    Entries are written to a temporary file that is renamed, so that
+    processes on the same host can share the directory without locking:
+    readers either see a complete entry or none. Reading an entry updates its
+    modification time, which is used to decide which entries were used least
+    recently; the directory is scanned for this after every sixteenth of
+    `max_bytes` written, so the bound may be exceeded by that much.
+
+    """
+
+    def __init__(self, directory, max_bytes=2 ** 28):
+        """Create a cache in a directory"""
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._written = None # bytes written since the last scan, if any
+        _makedirs(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key, default=None):
+        """The value of an entry, or `default` if there is none"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as entry:
+                value = pickle.loads(zlib.decompress(entry.read()))
+        except (IOError, zlib.error, pickle.UnpicklingError,
+                EOFError, AttributeError, ImportError):
+            return default
+        try:
+            os.utime(path, None) # mark as recently used
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        """Store the value of an entry"""
+        data = zlib.compress(pickle.dumps(value, 2))
+        directory = os.path.dirname(self._path(key))
+        _makedirs(directory)
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.')
+        try:
+            with os.fdopen(descriptor, 'wb') as entry:
+                entry.write(data)
+            os.rename(temporary, self._path(key))
+        except (IOError, OSError):
+            _remove(temporary)
+            raise
+        if self._written is None or self._written > self.max_bytes // 16:
+            self._evict()
+        else:
+            self._written += len(data)
+
+    def _scan(self):
+        """The modification time, size and path of all entries"""
+        entries = []
+        for subdirectory in os.listdir(self.directory):
+            subdirectory = os.path.join(self.directory, subdirectory)
+            if not os.path.isdir(subdirectory):
+                continue
+            for name in os.listdir(subdirectory):
+                if name.startswith('.'): # being written
+                    continue
+                path = os.path.join(subdirectory, name)
+                try:
+                    status = os.stat(path)
+                except OSError: # removed by another process
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Remove the least recently used entries until the total size is
+        within bounds"""
+        self._written = 0
+        entries = sorted(self._scan())
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            _remove(path)
+            total -= size
+
+    def entries(self):
+        """The number of entries
+
+          :rtype: :class:`int`
+
+        """
+        return len(self._scan())
+
+    def clear(self):
+        """Remove all entries"""
+        for mtime, size, path in self._scan():
+            _remove(path)
+
+
+def _makedirs(directory):
+    try:
+        os.makedirs(directory)
+    except OSError as error: # possibly created by another process
+        if error.errno != errno.EEXIST:
+            raise
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _canonical(data):
+    """A representation of data that does not depend on the order in which
+    sets and vectors happen to be stored"""
+    if isinstance(data, Vector):
+        return ('vector', tuple(sorted((repr(x), data[x].numerator,
+                                        data[x].denominator) for x in data)))
+    elif isinstance(data, (Set, set, frozenset)):
+        return ('set', tuple(sorted(_canonical(element) for element in data)))
+    elif isinstance(data, (tuple, list)):
+        return tuple(_canonical(element) for element in data)
+    else:
+        return repr(data)
+
+def key(*parts):
+    """The key of the entry for a calculation
+
+      :arg `parts`: the name of the calculation, the models and queries it
+        involves, e.g., as vectors and (nested) sets of vectors, and any
+        other parameters, which are represented by their :func:`repr`
+      :rtype: :class:`str`
+
+    >>> from murasyp.gambles import Gamble, Cone
+    >>> (key('lower', [Cone(['a', 'b'])], Gamble({'a': 1, 'b': .5}))
+    ...  == key('lower', [Cone(['b', 'a'])], Gamble({'b': '1/2', 'a': 1})))
+    True
+
+    """
+    return hashlib.sha1(repr(_canonical(parts))).hexdigest()
+
+_missing = object()
+
+def cached(parts, calculate):
+    """The result of a calculation, looked up in :data:`default_cache` first
+    if it is set, and stored into it otherwise
+
+      :arg `parts`: the arguments of :func:`key`, or a function without
+        arguments returning them, for when they are costly to obtain
+      :type `parts`: :class:`tuple`
+      :arg `calculate`: the calculation
+      :type `calculate`: a function without arguments
+
+    """
+    cache = default_cache
+    if cache is None:
+        return calculate()
+    digest = key(*(parts() if callable(parts) else parts))
+    value = cache.get(digest, _missing)
+    if value is _missing:
+        value = calculate()
+        cache.put(digest, value)
+    return value
@@ -0,0 +1,421 @@
+"""Batches of queries are run from the command line with ``python -m murasyp``.
+
+A model is loaded from a JSON file once, after which the lower or upper
+expectations of a stream of gambles are calculated, its coherence is checked,
+or it is converted:
+
+.. code-block:: sh
+
+  python -m murasyp lower model.json < gambles.jsonl > lower.jsonl
+  python -m murasyp upper model.json gambles.jsonl --workers 4
+  python -m murasyp check model.json
+  python -m murasyp credal model.json > credal.json
+  python -m murasyp desir credal.json
+  python -m murasyp serve D=model.json K=credal.json --port 8000
+
+A model file contains a JSON object with either the key ``"desir"``, whose
+value is a list of cones, each a list of gambles, for a
+:class:`~murasyp.desirs.DesirSet`, or the key ``"credal"``, whose value is a
+list of probability mass functions, for a
+:class:`~murasyp.credalsets.CredalSet`. Gambles and mass functions are
+objects mapping states to numbers or to strings such as ``"1/3"``. The
+optional key ``"backend"`` selects the backend (see :mod:`murasyp.mathprog`).
+
+Gambles are read as JSON Lines, i.e., one JSON object per line, and for each
+gamble a line is written with its lower or upper expectation, or with the
+error raised for it, in the same order. Gambles are read and results written
+a chunk at a time, so memory use does not grow with the number of gambles,
+and the chunks are divided over the worker processes. A summary of the
+number of gambles, the time taken and the throughput is written to standard
+error. The ``serve`` command keeps models loaded in a
+:class:`~murasyp.server.QueryServer`.
+
+>>> import json, os, sys, tempfile
+>>> from StringIO import StringIO
+>>> descriptor, path = tempfile.mkstemp(suffix='.json')
+>>> with os.fdopen(descriptor, 'w') as model:
+...     json.dump({'desir': [[{'a': 1}, {'b': 1}, {'c': 1},
+...                           {'a': .5, 'b': -.5, 'c': .5}]]}, model)
+>>> gambles = StringIO('{"a": 1, "b": 0, "c": 1}\\n'
+...                    '{"a": 1, "b": -1}\\n'
+...                    '{"a": "one"}\\n')
+>>> main(['lower', path], gambles, stderr=StringIO())
+{"lower": "1/2"}
+{"lower": -1}
+{"error": "\\"one\\" is not a rational number"}
+0
+>>> main(['check', path])
+{"avoids_partial_loss": true, "avoids_sure_loss": true}
+0
+>>> main(['credal', path])
+{"credal": [{"a": "1/2", "b": "1/2"}, {"b": "1/2", "c": "1/2"}, {"a": 1}, {"c": 1}]}
+0
+
+Models that cannot be loaded or converted are reported on standard error,
+with a non-zero exit status:
+
+>>> with open(path, 'w') as model:
+...     json.dump({'desir': [[{'a': -1, 'b': -1}]]}, model)
+>>> main(['check', path])
+{"avoids_partial_loss": false, "avoids_sure_loss": false}
+0
+>>> main(['credal', path], stderr=sys.stdout)
+cannot convert the model: it incurs sure loss
+1
+>>> with open(path, 'w') as model:
+...     json.dump({'credal': 5}, model)
+>>> sys.stderr, stderr = sys.stdout, sys.stderr
+>>> try:
+...     main(['check', path])
+... except SystemExit as exit:
+...     print exit.code
+usage: ...
+python -m murasyp: error: cannot load the model: the value of 'credal' is a list of mass functions
+2
+>>> sys.stderr = stderr
+>>> os.remove(path)
+
+"""
+
+import argparse
+import errno
+import itertools
+import json
+import multiprocessing
+import sys
+import time
+from fractions import Fraction
+from murasyp.gambles import Gamble
+from murasyp.credalsets import CredalSet
+from murasyp.desirs import DesirSet
+import murasyp.mathprog
+
+def load_model(data):
+    """Create a model from its JSON representation
+
+      :arg `data`: the decoded JSON object, as described above
+      :type `data`: :class:`dict`
+      :rtype: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+
+    >>> load_model({'credal': [{'a': 1}, {'b': 1}]})
+    CredalSet([PMFunc({'a': 1}), PMFunc({'b': 1})])
+    >>> D = load_model({'desir': [[{'a': 1}, {'a': 2, 'b': -1}]],
+    ...                 'backend': 'cdd-float'})
+    >>> D, D.backend
+    (DesirSet([Cone([Ray({'a': 1}), Ray({'a': 1, 'b': '-1/2'})])]), 'cdd-float')
+
+    Data that does not represent a model raises a :class:`ValueError`:
+
+    >>> load_model({'credal': 5})
+    Traceback (most recent call last):
+      ...
+    ValueError: the value of 'credal' is a list of mass functions
+    >>> load_model({'desir': [[{'a': 'x'}]]})
+    Traceback (most recent call last):
+      ...
+    ValueError: "x" is not a rational number
+
+    """
+    if not isinstance(data, dict) or len({'credal', 'desir'} & set(data)) != 1:
+        raise ValueError("a model is an object with either the key 'credal' "
+                         "or the key 'desir'")
+    if 'credal' in data:
+        if not isinstance(data['credal'], list):
+            raise ValueError("the value of 'credal' is a list of mass "
+                             "functions")
+        model = CredalSet([_mapping(p, 'mass function')
+                           for p in data['credal']])
+    else:
+        if (not isinstance(data['desir'], list)
+            or not all(isinstance(cone, list) for cone in data['desir'])):
+            raise ValueError("the value of 'desir' is a list of cones, each "
+                             "a list of gambles")
+        model = DesirSet([[_mapping(f, 'gamble') for f in cone]
+                          for cone in data['desir']])
+    if 'backend' in data:
+        if not isinstance(data['backend'], basestring):
+            raise ValueError("unknown backend " + json.dumps(data['backend']))
+        murasyp.mathprog.get_backend(data['backend']) # raises if unknown
+        model.backend = data['backend']
+    return model
+
+def dump_model(model):
+    """The JSON representation of a model
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :returns: the object to be encoded as JSON, as described above
+      :rtype: :class:`dict`
+
+    """
+    mapping = lambda vector: {x: number(vector[x]) for x in vector}
+    if isinstance(model, CredalSet):
+        data = {'credal': [mapping(p) for p in model]}
+    else:
+        data = {'desir': [[mapping(ray) for ray in cone] for cone in model]}
+    if isinstance(model.backend, basestring):
+        data['backend'] = model.backend
+    return data
+
+def number(value):
+    """The JSON representation of a rational number: an integer, or a string
+    such as ``"1/3"``, as JSON has no exact fractions
+
+    >>> number(Fraction(2, 1)), number(Fraction(-1, 3))
+    (2, '-1/3')
+
+    """
+    value = Fraction(value)
+    return int(value) if value.denominator == 1 else str(value)
+
+def _parse(line):
+    """The gamble on a line of JSON"""
+    return _gamble(json.loads(line))
+
+def _gamble(data):
+    """The gamble represented by decoded JSON"""
+    return Gamble(_mapping(data, 'gamble'))
+
+def _mapping(data, name):
+    """Decoded JSON, checked to map states to rational numbers"""
+    if not isinstance(data, dict):
+        raise ValueError("a " + name + " is an object mapping states to "
+                         "numbers")
+    for value in data.itervalues():
+        try:
+            Fraction(str(value))
+        except ValueError:
+            raise ValueError(json.dumps(value) + " is not a rational number")
+    return data
+
+def _answer(model, kind, lines):
+    """The results for a batch of lines"""
+    results = len(lines) * [None]
+    indices, queries = [], []
+    for i, line in enumerate(lines):
+        try:
+            gamble = _parse(line)
+        except ValueError as error:
+            results[i] = {'error': str(error)}
+        else:
+            indices.append(i)
+            queries.append((kind, gamble))
+    for i, outcome in zip(indices, expectations(model, queries)):
+        results[i] = outcome
+    return results
+
+def expectations(model, queries):
+    """The results of a batch of lower and upper expectation queries
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :arg `queries`: pairs of ``'lower'`` or ``'upper'`` and a gamble
+      :type `queries`: :class:`list` of :class:`tuple`
+      :returns: for each query, the JSON representation of its result, i.e.,
+        an object with the kind of expectation as key, or with the key
+        ``'error'`` and the error raised for it
+      :rtype: :class:`list` of :class:`dict`
+
+    Lower and upper expectations are calculated together, as upper
+    expectations are lower expectations of the negated gambles, if the model
+    supports that (see :meth:`~murasyp.desirs.DesirSet.lower_expectations`);
+    if this fails, the gambles are tried one by one to find those that cause
+    the error.
+
+    >>> from murasyp.gambles import Gamble
+    >>> expectations(CredalSet('ab'), [('lower', Gamble({'a': 1, 'b': 2})),
+    ...                                ('upper', Gamble({'a': 1, 'b': 2}))])
+    [{'lower': 1}, {'upper': 2}]
+
+    """
+    signs = [1 if kind == 'lower' else -1 for kind, gamble in queries]
+    gambles = [sign * gamble for sign, (kind, gamble) in zip(signs, queries)]
+    try:
+        if isinstance(model, DesirSet):
+            values = model.lower_expectations(gambles)
+        else:
+            values = [model * gamble for gamble in gambles]
+        return [{kind: number(sign * value)}
+                for sign, (kind, gamble), value in zip(signs, queries, values)]
+    except Exception: # find the gambles that raise the error
+        outcomes = []
+        for sign, (kind, gamble) in zip(signs, queries):
+            try:
+                outcomes.append({kind: number(sign * (model * gamble))})
+            except Exception as error:
+                outcomes.append({'error': str(error)})
+        return outcomes
+
+_model = None # the model of a worker process
+
+def _initialize(model):
+    global _model
+    _model = model
+
+def _work(task):
+    return _answer(_model, *task)
+
+def _stream(model, kind, lines, output, workers, batch):
+    """Answer the gambles on the lines a chunk at a time
+
+      :returns: the number of gambles and of errors
+      :rtype: a pair (:class:`tuple`)
+
+    """
+    lines = (line for line in lines if line.strip() != '')
+    pool = (None if workers == 1
+                 else multiprocessing.Pool(workers, _initialize, (model,)))
+    count = errors = 0
+    try:
+        while True:
+            chunk = list(itertools.islice(lines, workers * batch))
+            if chunk == []:
+                break
+            tasks = [(kind, chunk[i:i + batch])
+                     for i in range(0, len(chunk), batch)]
+            if pool is None:
+                answers = [_answer(model, *task) for task in tasks]
+            else:
+                answers = pool.map(_work, tasks)
+            for result in itertools.chain(*answers):
+                output.write(json.dumps(result, sort_keys=True) + '\n')
+                count += 1
+                errors += 'error' in result
+            output.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count, errors
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m murasyp',
+        description="Query and convert uncertainty models stored as JSON.")
+    commands = parser.add_subparsers(dest='command')
+    for kind in ['lower', 'upper']:
+        command = commands.add_parser(
+            kind, help="calculate " + kind + " expectations of gambles")
+        command.add_argument('model', help="the JSON file of the model")
+        command.add_argument('gambles', nargs='?',
+                             help="the JSON Lines file of the gambles "
+                                  "(standard input by default)")
+        command.add_argument('--workers', type=int, default=1,
+                             help="the number of worker processes")
+        command.add_argument('--batch', type=int, default=64,
+                             help="the number of gambles per task")
+    for name, help in [('check', "check whether the model avoids sure and "
+                                 "partial loss"),
+                       ('credal', "convert the model to a credal set"),
+                       ('desir', "convert the model to a set of desirable "
+                                 "gambles")]:
+        command = commands.add_parser(name, help=help)
+        command.add_argument('model', help="the JSON file of the model")
+    command = commands.add_parser(
+        'serve', help="answer queries over HTTP, see murasyp.server")
+    command.add_argument('models', nargs='*', metavar='name=model',
+                         help="a name and the JSON file of a model to load")
+    command.add_argument('--host', default='127.0.0.1',
+                         help="the address to listen on")
+    command.add_argument('--port', type=int, default=8000,
+                         help="the port to listen on")
+    command.add_argument('--window', type=float, default=.005,
+                         help="the seconds requests wait to be batched")
+    command.add_argument('--max-batch', type=int, default=256,
+                         help="the largest number of gambles in a batch")
+    return parser
+
+def _load(path):
+    with open(path) as model:
+        return load_model(json.load(model))
+
+def main(arguments=None, stdin=None, stdout=None, stderr=None):
+    """Run a command
+
+      :arg `arguments`: the command-line arguments, by default those of the
+        process
+      :type `arguments`: :class:`list` of :class:`str`
+      :returns: the exit status
+      :rtype: :class:`int`
+
+    """
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    parser = _parser()
+    arguments = parser.parse_args(arguments)
+    if arguments.command == 'serve':
+        return _serve(parser, arguments, stderr)
+    try:
+        model = _load(arguments.model)
+    except (IOError, ValueError) as error:
+        parser.error("cannot load the model: " + str(error))
+    model = model.freeze() # derived data is shared by all queries
+    if arguments.command in ('lower', 'upper'):
+        if arguments.workers < 1 or arguments.batch < 1:
+            parser.error("the number of workers and the batch size must be "
+                         "positive")
+        lines = stdin if arguments.gambles is None else open(arguments.gambles)
+        start = time.time()
+        try:
+            count, errors = _stream(model, arguments.command, lines, stdout,
+                                    arguments.workers, arguments.batch)
+        except IOError as error:
+            if error.errno != errno.EPIPE:
+                raise
+            return 1 # the output was closed, e.g., by head
+        finally:
+            if lines is not stdin:
+                lines.close()
+        elapsed = time.time() - start
+        stderr.write("%s: %d gambles (%d errors) in %.3f s, %.1f gambles/s, "
+                     "%d worker(s)\n" % (arguments.command, count, errors,
+                                         elapsed, count / max(elapsed, 1e-9),
+                                         arguments.workers))
+    elif arguments.command == 'check':
+        if isinstance(model, CredalSet):
+            asl = apl = len(model) > 0
+        else:
+            asl, apl = model.asl(), model.apl()
+        stdout.write(json.dumps({'avoids_sure_loss': asl,
+                                 'avoids_partial_loss': apl},
+                                sort_keys=True) + '\n')
+    else:
+        try:
+            if arguments.command == 'credal' and isinstance(model, DesirSet):
+                model = model.get_credal()
+            elif arguments.command == 'desir' and isinstance(model, CredalSet):
+                model = model.get_desir()
+        except ValueError as error:
+            reason = ("it incurs sure loss" if isinstance(model, DesirSet)
+                                                and not model.asl()
+                      else str(error))
+            stderr.write("cannot convert the model: " + reason + "\n")
+            return 1
+        stdout.write(json.dumps(dump_model(model), sort_keys=True) + '\n')
+    return 0
+
+def _serve(parser, arguments, stderr):
+    """Run a query server until interrupted"""
+    from murasyp.server import QueryServer # imports this module
+    models = {}
+    for argument in arguments.models:
+        name, separator, path = argument.partition('=')
+        if separator == '' or name == '':
+            parser.error("models are given as name=model, not " + argument)
+        try:
+            models[name] = _load(path)
+        except (IOError, ValueError) as error:
+            parser.error("cannot load the model " + name + ": " + str(error))
+    server = QueryServer(models, (arguments.host, arguments.port),
+                         arguments.window, arguments.max_batch)
+    stderr.write("serving %d model(s) on http://%s:%d\n"
+                 % ((len(models),) + server.server_address[:2]))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
@@ -0,0 +1,247 @@
+"""The work done by the core algebra can be counted, per operation.
+
+Within a :func:`counting` block, the following events in the
+:mod:`~murasyp.functions`, :mod:`~murasyp.vectors`, :mod:`~murasyp.gambles`
+and :mod:`~murasyp.massfuncs` modules are counted:
+
+``constructions``
+  the :class:`~murasyp.functions.Function` objects (including vectors,
+  gambles and mass functions) that are created, in any way
+``elements``
+  the values stored in the mappings of the objects created
+``conversions``
+  the conversions of values to the rationals used internally
+``joins``
+  the joins of the domains of two functions for pointwise operations
+``domains``
+  the :class:`frozenset` domains that are built
+
+Each count is attributed to the outermost public operation that was being
+carried out in the same thread: a public method, operator or constructor of
+a class in these modules or in :mod:`~murasyp.credalsets`,
+:mod:`~murasyp.desirs` and :mod:`~murasyp.lowprobs`, named after the class
+of the object it is carried out on, e.g., ``'DesirSet.__mul__'``. The
+functions and the methods involved are only replaced by counting ones
+inside :func:`counting` blocks, so there is no overhead outside of them.
+
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.credalsets import CredalSet
+>>> f = Gamble({'a': 1, 'b': 2})
+>>> K = CredalSet('ab')
+>>> with counting() as counts:
+...     g = 2 * f - f
+...     K.discard_redundant()
+>>> print counts.report()
+operation                   constructions elements conversions joins domains
+Gamble.__sub__                          2        4           5     1       4
+CredalSet.discard_redundant             2        2           2     0       4
+Gamble.__rmul__                         1        2           3     0       0
+>>> counts.totals()['constructions']
+5
+>>> from murasyp.functions import Function
+>>> '_mapping' in vars(Function) # the counting property is removed
+False
+
+"""
+
+import threading
+from contextlib import contextmanager
+import murasyp
+import murasyp.functions
+import murasyp.vectors
+import murasyp.gambles
+import murasyp.massfuncs
+import murasyp.credalsets
+import murasyp.desirs
+import murasyp.lowprobs
+
+events = ('constructions', 'elements', 'conversions', 'joins', 'domains')
+
+# the modules whose events are counted and those with operations as well
+_counted = [murasyp.functions, murasyp.vectors, murasyp.gambles,
+            murasyp.massfuncs]
+_attributed = _counted + [murasyp.credalsets, murasyp.desirs,
+                          murasyp.lowprobs]
+
+# the special methods that are operations, besides the public methods
+_operators = {'__init__', '__add__', '__radd__', '__sub__', '__rsub__',
+              '__mul__', '__rmul__', '__div__', '__rdiv__', '__truediv__',
+              '__neg__', '__pow__', '__or__', '__ror__', '__and__',
+              '__rand__', '__xor__', '__rxor__', '__iadd__', '__isub__',
+              '__ior__', '__iand__', '__ixor__', '__le__', '__ge__',
+              '__lt__', '__gt__'}
+
+# the methods whose calls are events, besides being operations if public
+_events = {'domain': 'domains', '_domain_joiner': 'joins',
+           '_sparse_domain': 'joins'}
+
+class Counts(object):
+    """The counts of a :func:`counting` block
+
+    The attribute :attr:`operations` is a :class:`dict` mapping the names of
+    operations to a :class:`dict` mapping the names of events to their
+    counts; events outside of operations are attributed to ``None``.
+
+    """
+
+    def __init__(self):
+        self.operations = {}
+
+    def _add(self, operation, event, count):
+        counts = self.operations.get(operation)
+        if counts is None:
+            counts = self.operations[operation] = dict.fromkeys(events, 0)
+        counts[event] += count
+
+    def totals(self):
+        """The total counts of the events
+
+          :rtype: :class:`dict`
+
+        """
+        return {event: sum(counts[event]
+                           for counts in self.operations.itervalues())
+                for event in events}
+
+    def report(self):
+        """A table of the counts, per operation, with the operations with
+        the most constructions first
+
+          :rtype: :class:`str`
+
+        """
+        rows = sorted(self.operations.iteritems(),
+                      key=lambda item: (-item[1]['constructions'],
+                                        -item[1]['elements'], str(item[0])))
+        width = max([len('operation')]
+                    + [len(str(operation)) for operation, counts in rows])
+        lines = [' '.join(['operation'.ljust(width)] + list(events))]
+        for operation, counts in rows:
+            lines.append(' '.join([str(operation).ljust(width)]
+                                  + [str(counts[event]).rjust(len(event))
+                                     for event in events]))
+        return '\n'.join(lines)
+
+
+_active = [] # the Counts of the current counting blocks
+_patches = [] # (owner, name, original or _absent) of the installed counters
+_lock = threading.RLock()
+_local = threading.local() # the current operation of each thread
+_absent = object()
+
+def _record(event, count=1, operation=None):
+    """Add to the count of an event for the current operation"""
+    operation = getattr(_local, 'operation', None) or operation
+    with _lock:
+        for counts in _active:
+            counts._add(operation, event, count)
+
+def _operation(name, function, event):
+    """Wrap a method so that it is an operation, recording an event"""
+    def counted(owner, *args, **kwargs):
+        if getattr(_local, 'operation', None) is not None:
+            if event is not None:
+                _record(event)
+            return function(owner, *args, **kwargs)
+        cls = owner if isinstance(owner, type) else type(owner)
+        _local.operation = cls.__name__ + '.' + name
+        try:
+            if event is not None:
+                _record(event)
+            return function(owner, *args, **kwargs)
+        finally:
+            _local.operation = None
+    counted.__name__ = function.__name__
+    counted.__doc__ = function.__doc__
+    return counted
+
+def _event(function, event):
+    """Wrap a method so that it records an event"""
+    def counted(*args, **kwargs):
+        _record(event)
+        return function(*args, **kwargs)
+    counted.__name__ = function.__name__
+    counted.__doc__ = function.__doc__
+    return counted
+
+def _conversion(value):
+    _record('conversions')
+    return _make_rational(value)
+
+_make_rational = murasyp._make_rational
+
+def _new(cls, *args, **kwargs):
+    _record('constructions', operation=cls.__name__ + '.__init__')
+    return object.__new__(cls)
+
+def _get_mapping(self):
+    return self.__dict__['_mapping']
+
+def _set_mapping(self, mapping):
+    _record('elements', len(mapping))
+    self.__dict__['_mapping'] = mapping
+
+def _patch(owner, name, value):
+    _patches.append((owner, name, owner.__dict__.get(name, _absent)))
+    setattr(owner, name, value)
+
+def _install():
+    """Replace the functions and methods by counting ones"""
+    function = murasyp.functions.Function
+    _patch(function, '__new__', staticmethod(_new))
+    _patch(function, '_mapping', property(_get_mapping, _set_mapping))
+    for module in _counted:
+        if module.__dict__.get('_make_rational') is _make_rational:
+            _patch(module, '_make_rational', _conversion)
+    for module in _attributed:
+        for cls in vars(module).values():
+            if (not isinstance(cls, type)
+                or cls.__module__ != module.__name__):
+                continue
+            for name, attribute in vars(cls).items():
+                method = (attribute.__func__
+                          if isinstance(attribute, classmethod) else attribute)
+                if not hasattr(method, 'func_code'):
+                    continue # properties, static methods, other attributes
+                event = _events.get(name) if module in _counted else None
+                if not name.startswith('_') or name in _operators:
+                    counted = _operation(name, method, event)
+                elif event is not None:
+                    counted = _event(method, event)
+                else:
+                    continue
+                _patch(cls, name, counted if method is attribute
+                                          else classmethod(counted))
+
+def _uninstall():
+    """Restore the functions and methods"""
+    while _patches:
+        owner, name, original = _patches.pop()
+        if original is _absent:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+
+@contextmanager
+def counting():
+    """Count the events in the core algebra, as described above
+
+      :returns: the counts, which are complete at the end of the block
+      :rtype: :class:`Counts`
+
+    Events in all threads are counted while a block is active, and blocks
+    may be nested, in which case the events are counted for each of them.
+
+    """
+    counts = Counts()
+    with _lock:
+        if not _active:
+            _install()
+        _active.append(counts)
+    try:
+        yield counts
+    finally:
+        with _lock:
+            _active.remove(counts)
+            if not _active:
+                _uninstall()
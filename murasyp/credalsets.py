@@ -1,9 +1,12 @@
+import threading
 from collections import Mapping
-from cdd import Matrix, RepType
+from murasyp import _make_rational
+from murasyp.vectors import _pack, _unpack, _from_array, _to_array
 from murasyp.massfuncs import PMFunc
 from murasyp.gambles import Gamble, Ray
-import murasyp.credalsets
 import murasyp.mathprog
+import murasyp.precision
+import murasyp.setfuncs
 
 class CredalSet(set):
     """A set of probability mass functions
@@ -63,7 +66,25 @@ class CredalSet(set):
       >>> CredalSet('a') | CredalSet('b')
       CredalSet([PMFunc({'a': 1}), PMFunc({'b': 1})])
 
+    * The backend used for linear programming and vertex enumeration can be
+      chosen by setting the :attr:`backend` attribute (see
+      :mod:`murasyp.mathprog`).
+
+    * An immutable and hashable snapshot, which can be shared between
+      threads, is obtained with :meth:`freeze`.
+
+    * They are pickled compactly, using a table of the states and integer
+      numerators and denominators, and are unpickled without checking the
+      probability mass functions again.
+
+      >>> import pickle
+      >>> K = CredalSet([p, q])
+      >>> pickle.loads(pickle.dumps(K, 2)) == K
+      True
+
     """
+    backend = None
+
     def __init__(self, data=[]):
         """Initialize a credal set"""
         if isinstance(data, Mapping):
@@ -72,6 +93,98 @@ class CredalSet(set):
         else:
             set.__init__(self, (PMFunc(element) for element in data))
 
+    @classmethod
+    def from_matrix(cls, pspace, matrix):
+        """Create a credal set from a matrix of probability mass functions
+
+          :arg `pspace`: the possibility space, in the order of the columns
+          :type `pspace`: :class:`~collections.Sequence`
+          :arg `matrix`: the mass functions, one row per mass function; the
+            rows are normalized
+          :type `matrix`: a two-dimensional :class:`numpy.ndarray` or
+            :class:`~collections.Sequence` of rows of representations of
+            :class:`~numbers.Real`
+          :rtype: :class:`~murasyp.credalsets.CredalSet`
+
+        The nonnegativity of the values and the positivity of the rows' masses
+        are checked once for the whole matrix, after which the mass functions
+        are created directly.
+
+        >>> import numpy
+        >>> K = CredalSet.from_matrix('abc', numpy.array([[3, 7, 90],
+        ...                                               [7, 3, 90]]))
+        >>> K == CredalSet([{'a': .03, 'b': .07, 'c': .9},
+        ...                 {'a': .07, 'b': .03, 'c': .9}])
+        True
+        >>> K.to_matrix(dtype=object)[:, 2].tolist()
+        [Fraction(9, 10), Fraction(9, 10)]
+
+        """
+        pspace = tuple(pspace)
+        rows = _from_array(matrix)
+        if not all(isinstance(row, list) and len(row) == len(pspace)
+                   for row in rows):
+            raise ValueError("specify one row of " + str(len(pspace))
+                             + " values per mass function")
+        masses = [sum(row) for row in rows]
+        if any(value < 0 for row in rows for value in row):
+            raise ValueError("no PMFunc can be constructed from a matrix "
+                             "with negative values")
+        if any(mass == 0 for mass in masses):
+            raise ValueError("no PMFunc can be constructed from a matrix "
+                             "row with a total mass of zero")
+        K = cls()
+        for row, mass in zip(rows, masses):
+            p = PMFunc.__new__(PMFunc)
+            p._mapping = {x: value / mass for x, value in zip(pspace, row)
+                                          if value != 0}
+            set.add(K, p)
+        return K
+
+    def to_matrix(self, pspace=None, dtype=float):
+        """The probability mass functions as the rows of a NumPy array
+
+          :arg `pspace`: the possibility space, in the order of the columns,
+            which defaults to the sorted possibility space of the credal set
+          :type `pspace`: :class:`~collections.Sequence`
+          :arg `dtype`: the data type of the array; for ``object``, the
+            elements are :class:`~fractions.Fraction`
+          :rtype: :class:`numpy.ndarray`
+
+        The rows are in the credal set's iteration order.
+
+        """
+        if pspace is None:
+            pspace = sorted(self.pspace())
+        return _to_array(self, pspace, dtype)
+
+    def __reduce__(self):
+        """Pickle compactly, see :func:`~murasyp.vectors._pack`"""
+        state = {key: value for key, value in self.__dict__.iteritems()
+                            if key not in _Frozen._derived_attributes}
+        return (_unpickle_credalset, (type(self), _pack(self)), state)
+
+    def freeze(self):
+        """An immutable snapshot of the credal set
+
+          :rtype: :class:`~murasyp.credalsets.FrozenCredalSet`
+
+        The snapshot shares the probability mass functions, which are
+        immutable, and is only copied again once the credal set or its
+        backend has changed since the last snapshot, so that snapshots can be
+        taken before every batch of queries.
+
+        >>> K = CredalSet('ab')
+        >>> F = K.freeze()
+        >>> K.freeze() is F
+        True
+        >>> K.add('c')
+        >>> F, K.freeze() is F
+        (FrozenCredalSet([PMFunc({'a': 1}), PMFunc({'b': 1})]), False)
+
+        """
+        return FrozenCredalSet._snapshot_of(self)
+
     def add(self, data):
         """Add a probability mass function to the credal set
 
@@ -129,7 +242,7 @@ class CredalSet(set):
             if len(self) == 0:
                 raise Error("Empty credal sets have no expectations")
             else:
-                return min(p * other for p in self)
+                return murasyp.precision.down(min(p * other for p in self))
         else:
             raise TypeError(str(other) + " is not a gamble")
 
@@ -139,10 +252,74 @@ class CredalSet(set):
             if len(self) == 0:
                 raise Error("Empty credal sets have no expectations")
             else:
-                return max(p * other for p in self)
+                return murasyp.precision.up(max(p * other for p in self))
         else:
             raise TypeError(str(other) + " is not a gamble")
 
+    def lower_at_least(self, gamble, threshold):
+        """Check whether the lower expectation of a gamble is at least a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        The check stops at the first element that violates the threshold.
+
+        >>> p = PMFunc({'a': .03, 'b': .07, 'c': .9})
+        >>> q = PMFunc({'a': .07, 'b': .03, 'c': .9})
+        >>> K = CredalSet([p, q])
+        >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+        >>> K.lower_at_least(f, '-1/25'), K.lower_at_least(f, 0)
+        (True, False)
+
+        """
+        if not isinstance(gamble, Gamble):
+            raise TypeError(str(gamble) + " is not a gamble")
+        if len(self) == 0:
+            raise ValueError("Empty credal sets have no expectations")
+        threshold = _make_rational(threshold)
+        return all(p * gamble >= threshold for p in self)
+
+    def upper_at_most(self, gamble, threshold):
+        """Check whether the upper expectation of a gamble is at most a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        The check stops at the first element that violates the threshold.
+
+        """
+        return self.lower_at_least(-gamble, -_make_rational(threshold))
+
+    def check_lower_bounds(self, pairs):
+        """Check lower expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :returns: whether each lower expectation is at least its threshold
+          :rtype: :class:`list` of :class:`bool`
+
+        """
+        return [self.lower_at_least(gamble, threshold)
+                for gamble, threshold in pairs]
+
+    def check_upper_bounds(self, pairs):
+        """Check upper expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :returns: whether each upper expectation is at most its threshold
+          :rtype: :class:`list` of :class:`bool`
+
+        """
+        return [self.upper_at_most(gamble, threshold)
+                for gamble, threshold in pairs]
+
     def pspace(self):
         """The possibility space of the credal set
 
@@ -159,6 +336,42 @@ class CredalSet(set):
         """
         return frozenset.union(*(p.domain() for p in self))
 
+    def lower_probability_function(self, compact=False):
+        """The lower probabilities of all events of the possibility space
+
+          :arg `compact`: whether to return the values as a list indexed by
+            bitmask instead of as a dictionary keyed by events
+          :type `compact`: :class:`bool`
+          :returns: the lower probability function, i.e., the lower
+            expectations ``K * (Gamble(A) | K.pspace())`` for all events ``A``,
+            or, if `compact` is true, the possibility space's states as a
+            :class:`tuple` together with those lower probabilities as a
+            :class:`list` indexed as described in :mod:`murasyp.setfuncs`
+          :rtype: :class:`dict` or a pair (:class:`tuple`)
+
+        The probabilities of all events are generated per element probability
+        mass function in a single pass, instead of calculating an expectation
+        for each event separately.
+
+        >>> p = PMFunc({'a': .03, 'b': .07, 'c': .9})
+        >>> q = PMFunc({'a': .07, 'b': .03, 'c': .9})
+        >>> K = CredalSet([p, q])
+        >>> K.lower_probability_function()[frozenset('ab')]
+        Fraction(1, 10)
+        >>> K.lower_probability_function(compact=True)
+        (('a', 'b', 'c'), [0, Fraction(3, 100), Fraction(3, 100), Fraction(1, 10), Fraction(9, 10), Fraction(93, 100), Fraction(93, 100), Fraction(1, 1)])
+
+        """
+        if len(self) == 0:
+            raise ValueError("Empty credal sets have no lower probabilities")
+        states = tuple(sorted(self.pspace()))
+        values = map(min, zip(*(murasyp.setfuncs.event_values(states, p)
+                                for p in self)))
+        if compact:
+            return states, values
+        else:
+            return murasyp.setfuncs.as_dict(states, values)
+
     def discard_redundant(self):
         """Remove redundant elements from the credal set
 
@@ -168,19 +381,14 @@ class CredalSet(set):
         >>> K = CredalSet('abc')
         >>> K.add({'a': 1, 'b': 1, 'c': 1})
         >>> K
-        CredalSet([..., PMFunc({'a': '1/3', 'c': '1/3', 'b': '1/3'})])
+        CredalSet([...PMFunc({'a': '1/3', 'c': '1/3', 'b': '1/3'})...])
         >>> K.discard_redundant()
         >>> K
         CredalSet([PMFunc({'a': 1}), PMFunc({'b': 1}), PMFunc({'c': 1})])
 
         """
-        pspace = list(self.pspace())
         K = list(self)
-        mat = Matrix(list([1] + list(p[x] for x in pspace) for p in K),
-                     number_type='fraction')
-        mat.rep_type = RepType.GENERATOR
-        lin, red = mat.canonicalize()
-        for i in red:
+        for i in murasyp.mathprog.discard_redundant(K, self.backend):
             self.discard(K[i])
 
     def get_desir(self):
@@ -192,7 +400,169 @@ class CredalSet(set):
 
         >>> CredalSet([PMFunc({'a', 'b'}), PMFunc({'c', 'b'}),
         ...            PMFunc({'a'}), PMFunc({'c'})]).get_desir()
-        DesirSet([Cone([Ray({'a': 1}), Ray({'b': 1}), Ray({'c': 1}), Ray({'a': 1, 'c': 1, 'b': -1})])])
+        DesirSet([Cone([Ray({'a': 1, 'c': 1, 'b': -1}), Ray({'a': 1}), Ray({'b': 1}), Ray({'c': 1})])])
 
         """
-        return murasyp.desirs.DesirSet([murasyp.mathprog.vf_enumeration(self)])
+        import murasyp.desirs # deferred, as murasyp.desirs imports this module
+        D = murasyp.desirs.DesirSet([murasyp.mathprog.vf_enumeration(
+                                                      self, self.backend)])
+        D.backend = self.backend
+        return D
+
+
+class _Frozen(object):
+    """Immutability and derived data for the snapshots of models"""
+
+    # attributes that are not carried over to copies
+    _derived_attributes = ('_snapshot', '_values', '_locks', '_hash')
+
+    def _immutable(self, *args):
+        raise TypeError(type(self).__name__ + " objects cannot be changed")
+
+    add = discard = remove = pop = clear = update = _immutable
+    intersection_update = difference_update = _immutable
+    symmetric_difference_update = _immutable
+    __ior__ = __iand__ = __isub__ = __ixor__ = _immutable
+
+    def __setattr__(self, name, value):
+        """Only set private attributes, which hold derived data"""
+        if not name.startswith('_'):
+            self._immutable()
+        object.__setattr__(self, name, value)
+
+    def __hash__(self):
+        """Hash, which is that of the frozenset of the elements"""
+        if '_hash' not in self.__dict__:
+            self._hash = hash(frozenset(self))
+        return self._hash
+
+    @classmethod
+    def _snapshot_of(cls, model):
+        """The snapshot of a model, which is copied if the model's elements
+        or public attributes have changed since its last snapshot"""
+        public = lambda attributes: {name: value for name, value
+                                     in attributes.iteritems()
+                                     if not name.startswith('_')}
+        snapshot = model.__dict__.get('_snapshot')
+        if (snapshot is None or not set.__eq__(model, snapshot)
+            or public(model.__dict__) != public(snapshot.__dict__)):
+            snapshot = cls.__new__(cls)
+            set.update(snapshot, model) # the elements are immutable
+            snapshot.__dict__.update(
+                (name, value) for name, value in model.__dict__.iteritems()
+                if name not in cls._derived_attributes)
+            model._snapshot = snapshot
+        return snapshot
+
+    def freeze(self):
+        """The snapshot itself, as it is immutable"""
+        return self
+
+    def _derived(self, name, calculate):
+        """Data derived from the model, calculated once, even if several
+        threads need it at the same time"""
+        values = self.__dict__.setdefault('_values', {})
+        if name not in values:
+            locks = self.__dict__.setdefault('_locks', {})
+            with locks.setdefault(name, threading.Lock()):
+                if name not in values:
+                    values[name] = calculate()
+        return values[name]
+
+
+class FrozenCredalSet(_Frozen, CredalSet):
+    """An immutable snapshot of a credal set, see :meth:`CredalSet.freeze`
+
+      :type `data`: as for :class:`~murasyp.credalsets.CredalSet`
+
+    This class derives from :class:`~murasyp.credalsets.CredalSet`, so its
+    methods apply here as well, except for those that change it, and its
+    backend cannot be changed either.
+
+      >>> F = CredalSet('ab').freeze()
+      >>> F.add('c')
+      Traceback (most recent call last):
+        ...
+      TypeError: FrozenCredalSet objects cannot be changed
+      >>> {F: 'found'}[FrozenCredalSet('ab')]
+      'found'
+
+    The possibility space, lower probability function and corresponding set
+    of desirable gambles (which is frozen as well) are calculated once, when
+    they are first needed, also when several threads query the snapshot.
+
+    """
+
+    def pspace(self):
+        return self._derived('pspace', lambda: CredalSet.pspace(self))
+
+    def lower_probability_function(self, compact=False):
+        states, values = self._derived(
+            'lower probability function',
+            lambda: CredalSet.lower_probability_function(self, True))
+        if compact:
+            return states, list(values)
+        else:
+            return murasyp.setfuncs.as_dict(states, values)
+
+    def get_desir(self):
+        return self._derived('desir',
+                             lambda: CredalSet.get_desir(self).freeze())
+
+
+def lower_expectations(pmfuncs, gambles):
+    """Lower expectations of gambles for a stream of mass functions
+
+      :arg `pmfuncs`: the mass functions, e.g., those generated by
+        :meth:`~murasyp.desirs.DesirSet.iter_credal`, which are used once and
+        not kept
+      :type `pmfuncs`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.massfuncs.PMFunc` constructor
+      :type `gambles`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.gambles.Gamble` constructor
+      :rtype: :class:`list` of :class:`~fractions.Fraction`
+
+    The results are those of the ``*`` operator of the
+    :class:`CredalSet` of the mass functions, but only the smallest
+    expectations so far are kept.
+
+    >>> lower_expectations(iter([PMFunc('ab'), PMFunc('a')]),
+    ...                    [{'a': 1, 'b': 0}, {'a': 0, 'b': 1}])
+    [Fraction(1, 2), Fraction(0, 1)]
+
+    """
+    return [murasyp.precision.down(value)
+            for value in _envelope(pmfuncs, gambles, min)]
+
+def upper_expectations(pmfuncs, gambles):
+    """Upper expectations of gambles for a stream of mass functions
+
+      :type `pmfuncs`: as for :func:`lower_expectations`
+      :type `gambles`: as for :func:`lower_expectations`
+      :rtype: :class:`list` of :class:`~fractions.Fraction`
+
+    >>> upper_expectations(iter([PMFunc('ab'), PMFunc('a')]),
+    ...                    [{'a': 1, 'b': 0}, {'a': 0, 'b': 1}])
+    [Fraction(1, 1), Fraction(1, 2)]
+
+    """
+    return [murasyp.precision.up(value)
+            for value in _envelope(pmfuncs, gambles, max)]
+
+def _envelope(pmfuncs, gambles, extreme):
+    gambles = [Gamble(gamble) for gamble in gambles]
+    values = None
+    for p in pmfuncs:
+        if not isinstance(p, PMFunc):
+            p = PMFunc(p)
+        expectations = [p * gamble for gamble in gambles]
+        values = (expectations if values is None
+                               else map(extreme, values, expectations))
+    if values is None:
+        raise ValueError("Empty credal sets have no expectations")
+    return values
+
+def _unpickle_credalset(cls, payload):
+    K = cls.__new__(cls)
+    set.update(K, _unpack(PMFunc, payload))
+    return K
@@ -0,0 +1,200 @@
+"""Optimal choices between gambles
+
+The gambles of an option set are compared using the lower and upper
+expectations of a :class:`~murasyp.credalsets.CredalSet` or a
+:class:`~murasyp.desirs.DesirSet`, with each of the usual criteria for
+decision making under imprecise probabilities. Gambles are taken to be zero
+outside of their domain.
+
+>>> from murasyp.credalsets import CredalSet
+>>> from murasyp.desirs import DesirSet
+>>> options = [{'a': 1, 'b': 0}, {'a': 0, 'b': 1},
+...            {'a': .4, 'b': .4}, {'a': .3, 'b': .3}]
+>>> K = CredalSet('ab')
+>>> gamma_maximin(K, options)
+[Gamble({'a': '2/5', 'b': '2/5'})]
+>>> interval_dominance(K, options)
+[Gamble({'a': 1, 'b': 0}), Gamble({'a': 0, 'b': 1}), Gamble({'a': '2/5', 'b': '2/5'})]
+>>> maximality(K, options)
+[Gamble({'a': 1, 'b': 0}), Gamble({'a': 0, 'b': 1}), Gamble({'a': '2/5', 'b': '2/5'})]
+>>> e_admissibility(K, options)
+[Gamble({'a': 1, 'b': 0}), Gamble({'a': 0, 'b': 1})]
+>>> D = DesirSet(['ab'])
+>>> all(criterion(D, options) == criterion(K, options)
+...     for criterion in [gamma_maximin, interval_dominance, maximality,
+...                       e_admissibility])
+True
+
+The optimal gambles are returned in the order in which they were given. The
+criteria are nested: the E-admissible gambles are maximal, the maximal ones
+are not interval dominated, and so are the Gamma-maximin ones. Cheaper
+criteria are therefore used to prune the option set before more expensive
+ones are applied.
+
+"""
+
+from murasyp.gambles import Gamble
+from murasyp.credalsets import CredalSet
+from murasyp.desirs import DesirSet
+import murasyp.mathprog
+
+class _Options(object):
+    """An option set together with the expectations of its gambles under a
+    model, calculated once"""
+
+    def __init__(self, model, gambles):
+        """Extend the gambles to the possibility space and calculate their
+        lower and upper expectations"""
+        if not isinstance(model, (CredalSet, DesirSet)):
+            raise TypeError(str(model) + " is not a credal set or a set of "
+                            "desirable gambles")
+        self.model = model
+        self.gambles = [Gamble(gamble) for gamble in gambles]
+        self.pspace = frozenset(model.pspace()).union(
+                          *(gamble.domain() for gamble in self.gambles))
+        self.extended = [gamble | self.pspace for gamble in self.gambles]
+        if isinstance(model, CredalSet):
+            if len(model) == 0:
+                raise ValueError("Empty credal sets have no expectations")
+            # the expectations of each gamble under each mass function
+            self.table = [[p * gamble for gamble in self.extended]
+                          for p in model]
+            self.lower = [min(column) for column in zip(*self.table)]
+            self.upper = [max(column) for column in zip(*self.table)]
+        else:
+            self.lower = model.lower_expectations(self.extended)
+            self.upper = model.upper_expectations(self.extended)
+
+    def undominated(self):
+        """The indices of the gambles that are not interval dominated"""
+        best = max(self.lower)
+        return [i for i, upper in enumerate(self.upper) if upper >= best]
+
+    def maximal(self):
+        """The indices of the maximal gambles
+
+        A gamble that dominates another has a strictly larger lower
+        expectation, and the dominance relation is transitive, so it suffices
+        to compare each gamble with the maximal ones that have a larger lower
+        expectation, of which there is at least one if it is dominated.
+
+        """
+        maximal = []
+        for i in sorted(self.undominated(), key=lambda i: -self.lower[i]):
+            rivals = [j for j in maximal if self.lower[j] > self.lower[i]]
+            if any(self.upper[i] < self.lower[j]
+                   or all(self.extended[j][x] > self.extended[i][x]
+                          for x in self.pspace)
+                   for j in rivals):
+                continue
+            if isinstance(self.model, CredalSet):
+                gains = [min(row[j] - row[i] for row in self.table)
+                         for j in rivals]
+            else: # the differences share the linear program
+                gains = self.model.lower_expectations(
+                            self.extended[j] - self.extended[i]
+                            for j in rivals)
+            if all(gain <= 0 for gain in gains):
+                maximal.append(i)
+        return sorted(maximal)
+
+    def e_admissible(self, i, rivals):
+        """Check whether a gamble maximizes the expectation among the rivals
+        for some mass function of the model, using one linear program"""
+        rivals = [j for j in rivals if j != i]
+        if isinstance(self.model, CredalSet):
+            if any(all(row[i] >= row[j] for j in rivals)
+                   for row in self.table):
+                return True
+            # a mixture of the mass functions, with weights as variables
+            rows = [[0] + [row[i] - row[j] for row in self.table]
+                    for j in rivals]
+            n = len(self.table)
+        else:
+            # a mass function satisfying the rays, with masses as variables
+            states = list(self.pspace)
+            rays = [ray for cone in self.model.presolved() for ray in cone]
+            rows = ([[0] + [ray[x] for x in states] for ray in rays]
+                    + [[0] + [self.extended[i][x] - self.extended[j][x]
+                              for x in states] for j in rivals])
+            n = len(states)
+        equalities = [[-1] + n * [1]]
+        inequalities = rows + [[0] + [int(k == m) for k in range(n)]
+                               for m in range(n)]
+        status, value, solution = murasyp.mathprog.get_backend(
+            self.model.backend).maximize(equalities, inequalities,
+                                         (n + 1) * [0])
+        if status == 'optimal':
+            return True
+        elif status == 'inconsistent':
+            return False
+        raise ValueError("The linear program is " + status + '.')
+
+def gamma_maximin(model, gambles):
+    """The gambles with the largest lower expectation
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :type `gambles`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.gambles.Gamble` constructor
+      :rtype: :class:`list` of :class:`~murasyp.gambles.Gamble`
+
+    """
+    options = _Options(model, gambles)
+    best = max(options.lower)
+    return [gamble for gamble, lower in zip(options.gambles, options.lower)
+                   if lower == best]
+
+def interval_dominance(model, gambles):
+    """The gambles whose upper expectation is not below the lower expectation
+    of another
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :type `gambles`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.gambles.Gamble` constructor
+      :rtype: :class:`list` of :class:`~murasyp.gambles.Gamble`
+
+    """
+    options = _Options(model, gambles)
+    return [options.gambles[i] for i in options.undominated()]
+
+def maximality(model, gambles):
+    """The gambles for which no other one is preferred, i.e., for which the
+    lower expectation of no other one minus the gamble is positive
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :type `gambles`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.gambles.Gamble` constructor
+      :rtype: :class:`list` of :class:`~murasyp.gambles.Gamble`
+
+    Only the gambles that are not interval dominated are compared, and pairs
+    of gambles are first compared using their lower and upper expectations
+    and pointwise; the remaining lower expectations of differences for the
+    same gamble are calculated together.
+
+    """
+    options = _Options(model, gambles)
+    return [options.gambles[i] for i in options.maximal()]
+
+def e_admissibility(model, gambles):
+    """The gambles that have the largest expectation for some mass function of
+    the (closed) credal set
+
+      :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :type `gambles`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.gambles.Gamble` constructor
+      :rtype: :class:`list` of :class:`~murasyp.gambles.Gamble`
+
+    Only the maximal gambles are candidates and need to be compared, as any
+    other gamble has a lower expectation than a maximal one for all mass
+    functions. For credal sets, a candidate for which one of the mass
+    functions already suffices is accepted without a linear program.
+
+    """
+    options = _Options(model, gambles)
+    maximal = options.maximal()
+    return [options.gambles[i] for i in maximal
+                               if options.e_admissible(i, maximal)]
@@ -1,8 +1,16 @@
+import time
 from collections import Mapping
-from murasyp import _make_rational
+from murasyp import _make_rational, _as_fraction
+from murasyp.vectors import _pack, _unpack
 from murasyp.gambles import Gamble, Ray, Cone
+from murasyp.massfuncs import PMFunc
+from murasyp.credalsets import _Frozen
 import murasyp.credalsets
+import murasyp.cache
 import murasyp.mathprog
+import murasyp.precision
+import murasyp.setfuncs
+import murasyp.symmetry
 
 class DesirSet(set):
     """A set of cones
@@ -62,14 +70,90 @@ class DesirSet(set):
       >>> D * (Gamble('c') | {'b', 'c'})
       Fraction(1, 2)
 
+    * The lower and upper expectations of many gambles can be calculated
+      together, using :meth:`lower_expectations` and
+      :meth:`upper_expectations`, which set up the linear programs once per
+      conditioning event.
+
+    * A group of permutations of the states under which the set is invariant
+      can be declared by setting the :attr:`symmetry` attribute to a
+      :class:`~murasyp.symmetry.Symmetry`, for example one found by
+      :meth:`~murasyp.symmetry.Symmetry.detect`. Lower and upper expectations
+      of gambles that are invariant as well are then calculated on the
+      possibility space of the orbits.
+
+    * Bounds on lower expectations that become tighter over time can be
+      obtained using :meth:`lower_bounds` and :meth:`anytime_lower`, for when
+      exact answers take too long.
+
+    * Whether a lower or upper expectation lies above or below a threshold
+      can be decided without calculating it, using :meth:`lower_at_least`,
+      :meth:`upper_at_most` and their batch versions.
+
+    * The backend used for linear programming and vertex enumeration can be
+      chosen by setting the :attr:`backend` attribute (see
+      :mod:`murasyp.mathprog`).
+
+    * An immutable and hashable snapshot, which can be shared between
+      threads, is obtained with :meth:`freeze`.
+
+    * They are pickled compactly, using a table of the states, a table of the
+      rays with integer numerators and denominators, and for each cone the
+      indices of its rays, and are unpickled without normalizing the rays
+      again.
+
+      >>> import pickle
+      >>> pickle.loads(pickle.dumps(D, 2)) == D
+      True
+
     """
+    backend = None
+    symmetry = None
+    _presolved = None
+    _reduced = None
+    _digest = None
+
     def __init__(self, data=[]):
         """Initialize a set of desirable gambles"""
         if isinstance(data, Mapping):
             raise TypeError(type(self) + " does not accept a mapping,"
                             + " but you passed it " + str(data))
         else:
-            set.__init__(self, (Cone(element) for element in data))
+            set.__init__(self, (_outward(Cone(element)) for element in data))
+
+    def __reduce__(self):
+        """Pickle compactly, see :func:`~murasyp.vectors._pack`"""
+        table = {}
+        for cone in self:
+            for ray in cone:
+                table.setdefault(ray, len(table))
+        rays = sorted(table, key=table.get)
+        cones = tuple(tuple(table[ray] for ray in cone) for cone in self)
+        state = {key: value for key, value in self.__dict__.iteritems()
+                            if key not in ('_presolved', '_reduced', '_digest')
+                               + _Frozen._derived_attributes}
+        return (_unpickle_desirset, (type(self), _pack(rays), cones), state)
+
+    def freeze(self):
+        """An immutable snapshot of the set of desirable gambles
+
+          :rtype: :class:`~murasyp.desirs.FrozenDesirSet`
+
+        The snapshot shares the cones, which are immutable, and the data
+        derived so far, and is only copied again once the set of desirable
+        gambles, its backend or its symmetry has changed since the last
+        snapshot. A snapshot taken by the thread that changes the set of
+        desirable gambles can be queried by other threads meanwhile.
+
+        >>> D = DesirSet(['abc'])
+        >>> F = D.freeze()
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> f = Gamble({'a': 1, 'b': 0, 'c': 1})
+        >>> F * f, D.freeze() * f
+        (0, Fraction(1, 2))
+
+        """
+        return FrozenDesirSet._snapshot_of(self)
 
     def add(self, data):
         """Add a cone to the set of desirable gambles
@@ -89,7 +173,7 @@ class DesirSet(set):
             see whether all set functionality is carried over
 
         """
-        set.add(self, Cone(data))
+        set.add(self, _outward(Cone(data)))
 
     def discard(self, data):
         """Remove a cone from the set of desirable gambles
@@ -109,7 +193,7 @@ class DesirSet(set):
             see whether all set functionality is carried over
 
         """
-        set.discard(self, frozenset(Ray(element) for element in data))
+        set.discard(self, _outward(Cone(data)))
 
     def pspace(self):
         """The possibility space of the set of desirable gambles
@@ -128,6 +212,45 @@ class DesirSet(set):
         """
         return frozenset.union(*(cone.domain() for cone in self))
 
+    def presolved(self):
+        """Simplified version of the set of desirable gambles
+
+          :returns: an equivalent set of desirable gambles in which each cone
+            only contains extreme rays and in which no cone's relative interior
+            is included in that of another cone
+          :rtype: :class:`~murasyp.desirs.DesirSet`
+
+        The rays of a cone that are nonnegative combinations of its other rays
+        and the cones whose gambles are implied by another cone are removed,
+        which shrinks the linear programs that are solved for queries. Cheap
+        tests on supports and signs are done before any linear program is
+        solved and the result is stored until the set of desirable gambles
+        changes.
+
+        >>> D = DesirSet()
+        >>> D.set_lower_pr(Gamble('a') | {'a', 'b'}, .4)
+        >>> D.set_lower_pr(Gamble('a') | {'a', 'b'}, .3)
+        >>> D.add(['a', 'b', {'a': 1, 'b': 1}])
+        >>> D.presolved()
+        DesirSet([Cone([Ray({'a': 1}), Ray({'b': 1})]), Cone([Ray({'a': 1, 'b': 1}), Ray({'a': 1, 'b': '-2/3'})])])
+
+        """
+        key = frozenset(self)
+        if self._presolved is not None and self._presolved[0] == key:
+            return DesirSet(self._presolved[1])
+        reduced = {} if self._presolved is None else self._presolved[2]
+        reduced = {cone: reduced[cone] if cone in reduced
+                         else Cone(murasyp.mathprog.extreme_rays(cone,
+                                                                 self.backend))
+                   for cone in self}
+        cones = set(reduced.itervalues())
+        for cone in sorted(cones, key=len):
+            if any(murasyp.mathprog.includes(other, cone, self.backend)
+                   for other in cones if other != cone):
+                cones.discard(cone)
+        self._presolved = (key, frozenset(cones), reduced)
+        return DesirSet(cones)
+
     def set_lower_pr(self, data, val):
         """Set the lower probability/prevision (expectation) of an event/gamble
 
@@ -143,7 +266,7 @@ class DesirSet(set):
         >>> D = DesirSet()
         >>> D.set_lower_pr(Gamble({'a', 'b'}) | {'a', 'b', 'c'}, .4)
         >>> D
-        DesirSet([Cone([Ray({'a': 1, 'c': 1, 'b': 1}), Ray({'a': 1, 'c': '-2/3', 'b': 1})])])
+        DesirSet([Cone([Ray({'a': 1, 'c': '-2/3', 'b': 1}), Ray({'a': 1, 'c': 1, 'b': 1})])])
 
         .. note::
 
@@ -168,7 +291,7 @@ class DesirSet(set):
         >>> D = DesirSet()
         >>> D.set_upper_pr(Gamble({'a', 'b'}) | {'a', 'b', 'c'}, .4)
         >>> D
-        DesirSet([Cone([Ray({'a': 1, 'c': 1, 'b': 1}), Ray({'a': -1, 'c': '2/3', 'b': -1})])])
+        DesirSet([Cone([Ray({'a': -1, 'c': '2/3', 'b': -1}), Ray({'a': 1, 'c': 1, 'b': 1})])])
 
         .. note::
 
@@ -192,7 +315,7 @@ class DesirSet(set):
         >>> D = DesirSet()
         >>> D.set_pr(Gamble({'a', 'b'}) | {'a', 'b', 'c'}, .4)
         >>> D
-        DesirSet([Cone([Ray({'a': 1, 'c': 1, 'b': 1}), Ray({'a': 1, 'c': '-2/3', 'b': 1})]), Cone([Ray({'a': 1, 'c': 1, 'b': 1}), Ray({'a': -1, 'c': '2/3', 'b': -1})])])
+        DesirSet([Cone([Ray({'a': 1, 'c': '-2/3', 'b': 1}), Ray({'a': 1, 'c': 1, 'b': 1})]), Cone([Ray({'a': -1, 'c': '2/3', 'b': -1}), Ray({'a': 1, 'c': 1, 'b': 1})])])
 
         .. note::
 
@@ -225,8 +348,14 @@ class DesirSet(set):
         True
 
         """
-        D = DesirSet([Cone.union(*(self | DesirSet([self.pspace()])))])
-        return murasyp.mathprog.feasible(D) == set()
+        components = self.components()
+        if len(components) > 1: # sure loss needs all of them and all states
+            covered = frozenset.union(*(C.pspace() for C in components))
+            return (covered != self.pspace()
+                    or any(C.asl() for C in components))
+        D = DesirSet([Cone.union(*(self.presolved()
+                                   | DesirSet([self.pspace()])))])
+        return murasyp.mathprog.feasible(D, backend=self.backend) == set()
 
     def apl(self):
         """Check whether the set of desirable gambles avoids partial loss
@@ -256,23 +385,398 @@ class DesirSet(set):
         True
 
         """
-        D = self | DesirSet(self.pspace())
-        return murasyp.mathprog.feasible(D) == set()
+        components = self.components()
+        if len(components) > 1:
+            return all(C.apl() for C in components)
+        D = self.presolved() | DesirSet(self.pspace())
+        return murasyp.mathprog.feasible(D, backend=self.backend) == set()
+
+    def components(self):
+        """Split the presolved set of desirable gambles into independent parts
+
+          :returns: the connected components of the presolved cones, two cones
+            being connected if their domains overlap
+          :rtype: :class:`list` of :class:`~murasyp.desirs.DesirSet`
+
+        The components are the sets of desirable gambles on disjoint parts of
+        the possibility space. The set avoids sure loss if one of them does
+        (or if some states are not covered by them) and avoids partial loss
+        if all of them do, which is how :meth:`asl` and :meth:`apl` check it.
+        Lower expectations only involve the components whose domain
+        intersects the gamble's, which gives the same results for sets that
+        avoid partial loss.
+
+        >>> D = DesirSet(['ab', 'c'])
+        >>> D.set_lower_pr(Gamble('c') | {'c', 'd'}, .5)
+        >>> sorted(sorted(C.pspace()) for C in D.components())
+        [['a', 'b'], ['c', 'd']]
+        >>> D * (Gamble({'c': 1, 'd': 0}))
+        Fraction(1, 2)
+
+        """
+        components = []
+        for cones in _components(self.presolved()):
+            C = DesirSet(cones)
+            C.backend = self.backend
+            C._presolved = (frozenset(C), frozenset(C), {A: A for A in C})
+            components.append(C)
+        return components
+
+    def _expectation_lp(self, domain, cones=None):
+        """The data and objective of the lower expectations of gambles with
+        the given domain, using only the given cones if specified"""
+        indicator = Gamble(domain)
+        D = self.presolved() if cones is None else DesirSet(cones)
+        pspace = self.pspace()
+        components = _components(D)
+        if len(components) > 1: # only those that the domain is connected to
+            D = DesirSet(cone for cones in components
+                              if any(cone.domain() & domain for cone in cones)
+                              for cone in cones)
+            pspace = frozenset().union(*(cone.domain() for cone in D))
+        return (D | DesirSet(pspace | domain)
+                  | DesirSet([{indicator}, {-indicator}, {()}]),
+                (0, {indicator: 1, -indicator: -1}))
+
+    def _reduction(self, gamble):
+        """The set of desirable gambles on the orbits of the symmetry and the
+        gamble averaged over them, if the symmetry applies to the gamble"""
+        if (self.symmetry is None
+            or not self.symmetry.is_invariant(Gamble(gamble))):
+            return None
+        return self._reduced_model(), self.symmetry.reduce(Gamble(gamble))
+
+    def _reduced_model(self):
+        """The set of desirable gambles on the orbits of the symmetry"""
+        key = (frozenset(self), self.symmetry)
+        if self._reduced is None or self._reduced[0] != key:
+            if not self.symmetry.is_invariant(self):
+                raise ValueError("the set of desirable gambles is not "
+                                 "invariant under its symmetry")
+            reduced = DesirSet(self.symmetry.reduce_cones(self))
+            reduced.backend = self.backend
+            self._reduced = (key, reduced)
+        return self._reduced[1]
+
+    def _cones_digest(self):
+        """The hash of the cones used in cache keys"""
+        key = frozenset(self)
+        if self._digest is None or self._digest[0] != key:
+            self._digest = (key, murasyp.cache.key(key))
+        return self._digest[1]
+
+    def _cache_key(self, gamble):
+        """The parts of the cache key of the lower expectation of a gamble"""
+        return ('lower expectation', self._cones_digest(), gamble,
+                murasyp.mathprog._backend_key(self.backend))
 
     def __mul__(self, other):
         """Lower expectation of a gamble"""
         gamble = Gamble(other)
-        indicator = Gamble(gamble.domain())
-        return murasyp.mathprog.maximize(
-                  self | DesirSet(self.pspace() | gamble.domain()
-                                                | indicator.domain())
-                       | DesirSet([{indicator}, {-indicator}, {()}]),
-                  gamble, (0, {indicator: 1, -indicator: -1}))
+        return murasyp.precision.down(murasyp.cache.cached(
+                   lambda: self._cache_key(gamble),
+                   lambda: self._lower_expectation(gamble)))
+
+    def _lower_expectation(self, gamble):
+        reduction = self._reduction(gamble)
+        if reduction is not None:
+            return reduction[0]._lower_expectation(reduction[1])
+        data, objective = self._expectation_lp(gamble.domain())
+        return murasyp.mathprog.maximize(data, gamble, objective, self.backend)
 
     def __pow__(self, other):
         """Upper expectation of a gamble"""
         return - self.__mul__(- other)
 
+    def lower_expectations(self, gambles):
+        """Lower expectations of a number of gambles
+
+          :type `gambles`: :class:`~collections.Iterable` of arguments
+            accepted by the :class:`~murasyp.gambles.Gamble` constructor
+          :rtype: :class:`list`
+
+        The linear programs of gambles with the same domain, i.e., with the
+        same conditioning event, are set up once and only solved for each
+        gamble (see :func:`~murasyp.mathprog.maximize_many`), and only for
+        the gambles whose lower expectations are not cached (see
+        :mod:`murasyp.cache`).
+
+        >>> D = DesirSet([[Gamble({'a': -1, 'c': '7/90'}),
+        ...                Gamble({'a': 1, 'c': '-1/30'}),
+        ...                Gamble({'a': -1, 'c': '1/9', 'b': -1}),
+        ...                Gamble({'a': 1, 'c': '-1/9', 'b': 1})]])
+        >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+        >>> D.lower_expectations([f, -f, f | f.support()])
+        [Fraction(-1, 25), Fraction(-1, 25), Fraction(-2, 5)]
+
+        """
+        gambles = [Gamble(gamble) for gamble in gambles]
+        cache = murasyp.cache.default_cache
+        if cache is None:
+            values = self._lower_expectations(gambles)
+        else:
+            values = self._cached_lower_expectations(gambles, cache)
+        return [murasyp.precision.down(value) for value in values]
+
+    def _cached_lower_expectations(self, gambles, cache):
+        keys = [murasyp.cache.key(*self._cache_key(gamble))
+                for gamble in gambles]
+        values = [cache.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        for i, value in zip(missing, self._lower_expectations(
+                [gambles[i] for i in missing])):
+            cache.put(keys[i], value)
+            values[i] = value
+        return values
+
+    def _lower_expectations(self, gambles):
+        domains = {}
+        reduced = []
+        for i, gamble in enumerate(gambles):
+            reduction = self._reduction(gamble)
+            if reduction is None:
+                domains.setdefault(gamble.domain(), []).append(i)
+            else:
+                reduced.append((i, reduction[1]))
+        values = len(gambles) * [None]
+        if reduced != []:
+            model = self._reduced_model()
+            for (i, gamble), value in zip(reduced, model._lower_expectations(
+                    [gamble for i, gamble in reduced])):
+                values[i] = value
+        for domain, indices in domains.iteritems():
+            data, objective = self._expectation_lp(domain)
+            for i, value in zip(indices, murasyp.mathprog.maximize_many(
+                    data, [gambles[i] for i in indices], objective,
+                    self.backend)):
+                values[i] = value
+        return values
+
+    def upper_expectations(self, gambles):
+        """Upper expectations of a number of gambles
+
+          :type `gambles`: :class:`~collections.Iterable` of arguments
+            accepted by the :class:`~murasyp.gambles.Gamble` constructor
+          :rtype: :class:`list`
+
+        """
+        return [- value for value in
+                self.lower_expectations(- Gamble(gamble) for gamble in gambles)]
+
+    def lower_bounds(self, gamble, credal=None):
+        """Successively tighter bounds on the lower expectation of a gamble
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :arg `credal`: probability mass functions that are candidates for
+            the credal set of the set of desirable gambles, such as the
+            vertices of an earlier calculated credal set
+          :type `credal`: :class:`~murasyp.credalsets.CredalSet` or ``None``
+          :returns: a generator of bounds, the last of which is exact
+          :rtype: :class:`~collections.Iterator` of
+            :class:`~murasyp.desirs.PrevisionBounds`
+
+        The first bounds are the minimum and maximum of the gamble, tightened
+        from above by the expectations of the candidate mass functions that
+        satisfy all of the set's rays (only for gambles whose domain includes
+        the possibility space). Lower bounds follow from the lower expectations
+        under doubling subsets of the presolved cones, the last being all of
+        them. The bounds are valid for sets of desirable gambles that avoid
+        sure loss.
+
+        >>> D = DesirSet([[Gamble({'a': -1, 'c': '7/90'}),
+        ...                Gamble({'a': 1, 'c': '-1/30'}),
+        ...                Gamble({'a': -1, 'c': '1/9', 'b': -1}),
+        ...                Gamble({'a': 1, 'c': '-1/9', 'b': 1})]])
+        >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+        >>> from murasyp.credalsets import CredalSet
+        >>> K = CredalSet([{'a': .05, 'b': .05, 'c': .9}, 'abc'])
+        >>> for bounds in D.lower_bounds(f, K):
+        ...     print bounds
+        PrevisionBounds(Fraction(-1, 1), Fraction(0, 1))
+        PrevisionBounds(Fraction(-1, 25), Fraction(-1, 25), 'lower')
+
+        """
+        gamble = Gamble(gamble)
+        domain = gamble.domain()
+        lower, upper = gamble.bounds()
+        if credal is not None and self.pspace() <= domain:
+            rays = [ray for cone in self for ray in cone]
+            values = [sum(p[x] * gamble[x] for x in domain)
+                      for p in credal
+                      if all(sum(p[x] * ray[x] for x in ray) >= 0
+                             for ray in rays)]
+            upper = min([upper] + values)
+        if lower >= upper:
+            yield PrevisionBounds(upper, upper, 'upper')
+            return
+        yield PrevisionBounds(lower, upper)
+        cones = sorted(self.presolved(), key=len)
+        k = 1
+        while k < len(cones):
+            data, objective = self._expectation_lp(domain, cones[:k])
+            lower = max(lower, murasyp.mathprog.maximize(data, gamble,
+                                                         objective,
+                                                         self.backend))
+            if lower >= upper:
+                yield PrevisionBounds(upper, upper, 'upper')
+                return
+            yield PrevisionBounds(lower, upper)
+            k *= 2
+        value = self * gamble
+        yield PrevisionBounds(value, value, 'lower')
+
+    def anytime_lower(self, gamble, timeout=None, tolerance=0, credal=None):
+        """Bounds on the lower expectation of a gamble within a time limit
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :arg `timeout`: the number of seconds after which no tighter bounds
+            are calculated
+          :type `timeout`: a representation of :class:`~numbers.Real`
+          :arg `tolerance`: the width of the bounds that is good enough
+          :type `tolerance`: a representation of :class:`~numbers.Real`
+          :type `credal`: see :meth:`lower_bounds`
+          :rtype: :class:`~murasyp.desirs.PrevisionBounds`
+
+        The bounds of :meth:`lower_bounds` are tightened until they are exact,
+        narrower than the tolerance, or until the timeout has passed; the
+        timeout is checked between steps, so the last step may overrun it.
+
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> D.anytime_lower(Gamble({'a': 1, 'b': 0, 'c': 1}), tolerance=1)
+        PrevisionBounds(Fraction(0, 1), Fraction(1, 1))
+        >>> D.anytime_lower(Gamble({'a': 1, 'b': 0, 'c': 1}))
+        PrevisionBounds(Fraction(1, 2), Fraction(1, 2), 'lower')
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        tolerance = _make_rational(tolerance)
+        for bounds in self.lower_bounds(gamble, credal):
+            if (bounds.exact or bounds.upper - bounds.lower <= tolerance
+                or (deadline is not None and time.time() >= deadline)):
+                break
+        return bounds
+
+    def lower_at_least(self, gamble, threshold, _lps=None):
+        """Check whether the lower expectation of a gamble is at least a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        The lower expectation itself is not calculated; the threshold is
+        imposed on the linear program and only its feasibility is checked
+        (see :func:`~murasyp.mathprog.reaches`).
+
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> f = Gamble({'a': 1, 'b': 0, 'c': 1})
+        >>> D.lower_at_least(f, .5), D.lower_at_least(f, .51)
+        (True, False)
+
+        """
+        gamble = Gamble(gamble)
+        reduction = self._reduction(gamble)
+        if reduction is not None: # the linear programs are stored under None
+            return reduction[0].lower_at_least(
+                reduction[1], threshold,
+                None if _lps is None else _lps.setdefault(None, {}))
+        domain = gamble.domain()
+        if _lps is None or domain not in _lps:
+            lp = self._expectation_lp(domain)
+            if _lps is not None:
+                _lps[domain] = lp
+        else:
+            lp = _lps[domain]
+        data, objective = lp
+        return murasyp.mathprog.reaches(data, gamble, objective, threshold,
+                                        self.backend)
+
+    def upper_at_most(self, gamble, threshold, _lps=None):
+        """Check whether the upper expectation of a gamble is at most a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        >>> D = DesirSet(['abc'])
+        >>> D.set_upper_pr({'a': 1, 'b': 0, 'c': 0}, .5)
+        >>> D.upper_at_most(Gamble({'a': 1, 'b': 0, 'c': 0}), .5)
+        True
+
+        """
+        return self.lower_at_least(-Gamble(gamble), -_make_rational(threshold),
+                                   _lps)
+
+    def check_lower_bounds(self, pairs):
+        """Check lower expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :returns: whether each lower expectation is at least its threshold
+          :rtype: :class:`list` of :class:`bool`
+
+        The linear programming data is shared between gambles with the same
+        domain.
+
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> D.check_lower_bounds([(Gamble('ac'), .5),
+        ...                       (Gamble('b') | set('abc'), .5)])
+        [True, False]
+
+        """
+        lps = {}
+        return [self.lower_at_least(gamble, threshold, lps)
+                for gamble, threshold in pairs]
+
+    def check_upper_bounds(self, pairs):
+        """Check upper expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :returns: whether each upper expectation is at most its threshold
+          :rtype: :class:`list` of :class:`bool`
+
+        """
+        lps = {}
+        return [self.upper_at_most(gamble, threshold, lps)
+                for gamble, threshold in pairs]
+
+    def lower_probability_function(self, compact=False):
+        """The lower probabilities of all events of the possibility space
+
+          :arg `compact`: whether to return the values as a list indexed by
+            bitmask instead of as a dictionary keyed by events
+          :type `compact`: :class:`bool`
+          :returns: the lower probability function, i.e., the lower
+            expectations ``D * (Gamble(A) | D.pspace())`` for all events ``A``,
+            in the format described for
+            :meth:`~murasyp.credalsets.CredalSet.lower_probability_function`
+          :rtype: :class:`dict` or a pair (:class:`tuple`)
+
+        A single vertex enumeration replaces the linear programs that would be
+        needed for each event separately.
+
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> P = D.lower_probability_function()
+        >>> P[frozenset('ac')] == D * (Gamble('ac') | D.pspace())
+        True
+        >>> states, values = D.lower_probability_function(compact=True)
+        >>> murasyp.setfuncs.is_2monotone(values)
+        True
+
+        """
+        D = self.presolved() | DesirSet(self.pspace())
+        D.backend = self.backend
+        K = D.get_credal()
+        return K.lower_probability_function(compact)
+
     def get_credal(self):
         """Generate the corresponding (closed) credal set
 
@@ -286,6 +790,186 @@ class DesirSet(set):
         CredalSet([PMFunc({'a': '1/2', 'b': '1/2'}), PMFunc({'c': '1/2', 'b': '1/2'}), PMFunc({'a': 1}), PMFunc({'c': 1})])
 
         """
-        C = Cone.union(*self)
-        return murasyp.credalsets.CredalSet(murasyp.mathprog.vf_enumeration(C))
+        C = Cone.union(*self.presolved())
+        K = murasyp.credalsets.CredalSet(
+                murasyp.mathprog.vf_enumeration(C, self.backend))
+        K.backend = self.backend
+        return K
+
+    def iter_credal(self, max_vertices=None):
+        """Generate the extreme points of the corresponding (closed) credal
+        set one at a time
+
+          :arg `max_vertices`: the number of extreme points after which a
+            :class:`ValueError` is raised instead of generating more, if any
+          :type `max_vertices`: :class:`int`
+          :returns: the mass functions of :meth:`get_credal`, created as they
+            are enumerated (see
+            :func:`~murasyp.mathprog.iter_vf_enumeration`)
+          :rtype: an iterator of :class:`~murasyp.massfuncs.PMFunc`
+
+        The iteration can be stopped early, and lower and upper expectations
+        can be calculated without keeping the extreme points in memory (see
+        :func:`~murasyp.credalsets.lower_expectations`):
+
+        >>> from murasyp.credalsets import lower_expectations
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+        >>> f = Gamble({'a': 1, 'b': -1, 'c': 0})
+        >>> lower_expectations(D.iter_credal(), [f, -f])
+        [Fraction(-1, 2), Fraction(-1, 1)]
+        >>> list(D.iter_credal(max_vertices=3))
+        Traceback (most recent call last):
+          ...
+        ValueError: the credal set has more than 3 extreme points
+
+        """
+        C = Cone.union(*self.presolved())
+        return _capped((PMFunc(vector) for vector
+                        in murasyp.mathprog.iter_vf_enumeration(C,
+                                                                self.backend)),
+                       max_vertices)
+
+
+class FrozenDesirSet(_Frozen, DesirSet):
+    """An immutable snapshot of a set of desirable gambles, see
+    :meth:`DesirSet.freeze`
+
+      :type `data`: as for :class:`~murasyp.desirs.DesirSet`
+
+    This class derives from :class:`~murasyp.desirs.DesirSet`, so its methods
+    apply here as well, except for those that change it, and its backend and
+    symmetry cannot be changed either.
+
+      >>> F = DesirSet(['abc']).freeze()
+      >>> F.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+      Traceback (most recent call last):
+        ...
+      TypeError: FrozenDesirSet objects cannot be changed
+      >>> F.backend = 'cdd-float'
+      Traceback (most recent call last):
+        ...
+      TypeError: FrozenDesirSet objects cannot be changed
+
+    The possibility space, presolved cones, components, linear programming
+    data per conditioning event, reduction by the symmetry and
+    corresponding credal set (which is frozen as well) are calculated once,
+    when they are first needed, also when several threads query the
+    snapshot.
+
+    """
+
+    def pspace(self):
+        return self._derived('pspace', lambda: DesirSet.pspace(self))
+
+    def presolved(self):
+        return DesirSet(self._derived(
+            'presolved', lambda: frozenset(DesirSet.presolved(self))))
+
+    def components(self):
+        return list(self._derived(
+            'components', lambda: [C.freeze()
+                                   for C in DesirSet.components(self)]))
+
+    def _expectation_lp(self, domain, cones=None):
+        if cones is not None:
+            return DesirSet._expectation_lp(self, domain, cones)
+        return self._derived(('expectation lp', domain),
+                             lambda: DesirSet._expectation_lp(self, domain))
+
+    def _reduced_model(self):
+        return self._derived('reduced',
+                             lambda: DesirSet._reduced_model(self).freeze())
+
+    def _cones_digest(self):
+        return self._derived('digest', lambda: DesirSet._cones_digest(self))
+
+    def get_credal(self):
+        return self._derived('credal',
+                             lambda: DesirSet.get_credal(self).freeze())
+
+    def iter_credal(self, max_vertices=None):
+        if 'credal' in self.__dict__.get('_values', {}): # calculated already
+            return _capped(self.get_credal(), max_vertices)
+        return DesirSet.iter_credal(self, max_vertices)
+
+
+class PrevisionBounds(object):
+    """Bounds on a lower or upper expectation
+
+      :arg `lower`: the lower bound
+      :arg `upper`: the upper bound
+      :arg `exact`: which bound, ``'lower'`` or ``'upper'``, is certified to
+        be equal to the bounded value, in which case the other bound is equal
+        to it as well, or ``None``
+
+    >>> bounds = PrevisionBounds(0, '1/2')
+    >>> bounds.lower, bounds.upper, bounds.exact
+    (Fraction(0, 1), Fraction(1, 2), None)
+
+    """
 
+    def __init__(self, lower, upper, exact=None):
+        """Create bounds"""
+        self.lower = _as_fraction(_make_rational(lower))
+        self.upper = _as_fraction(_make_rational(upper))
+        self.exact = exact
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return (type(self).__name__ + '(' + repr(self.lower) + ', '
+                + repr(self.upper)
+                + (', ' + repr(self.exact) if self.exact else '') + ')')
+
+    __str__ = __repr__
+
+    def __eq__(self, other):
+        """Equality of bounds"""
+        return (isinstance(other, PrevisionBounds)
+                and (self.lower, self.upper, self.exact)
+                    == (other.lower, other.upper, other.exact))
+
+    __ne__ = lambda self, other: not self == other
+
+
+def _outward(cone):
+    """The cone with the values of its rays rounded up, if there is a default
+    precision (see :mod:`murasyp.precision`)"""
+    precision = murasyp.precision.default_precision
+    if precision is None or all(ray[x].denominator
+                                <= precision.max_denominator
+                                for ray in cone for x in ray):
+        return cone
+    return Cone(Ray({x: precision.up(ray[x], 'assessments') for x in ray})
+                for ray in cone)
+
+def _capped(pmfuncs, max_vertices):
+    """The mass functions, raising an error after the given number"""
+    for count, pmfunc in enumerate(pmfuncs):
+        if count == max_vertices:
+            raise ValueError("the credal set has more than "
+                             + str(max_vertices) + " extreme points")
+        yield pmfunc
+
+def _components(cones):
+    """The connected components of cones, linked if their domains overlap"""
+    component = {} # state -> index in members
+    members = [] # index -> (states, cones), or None once merged
+    for cone in cones:
+        domain = cone.domain()
+        states, group = set(domain), [cone]
+        for i in set(component[x] for x in domain if x in component):
+            states |= members[i][0]
+            group.extend(members[i][1])
+            members[i] = None
+        for x in states:
+            component[x] = len(members)
+        members.append((states, group))
+    return [member[1] for member in members if member is not None]
+
+def _unpickle_desirset(cls, payload, cones):
+    rays = _unpack(Ray, payload)
+    D = cls.__new__(cls)
+    set.update(D, (Cone._from_elements(rays[i] for i in cone)
+                   for cone in cones))
+    return D
@@ -0,0 +1,218 @@
+"""Events of a finite possibility space, represented by bitmasks
+
+The states of the possibility space are given as a sequence and are interned,
+so that events of the same possibility space share their table of bit
+positions. These are the positions used by :mod:`murasyp.setfuncs`, so the
+bitmask of an event indexes compact set functions directly.
+
+>>> E = Event('abcd', 'ac')
+>>> E.mask
+5
+>>> E == frozenset('ac') and frozenset('ac') in {E: 'found'}
+True
+
+"""
+
+from collections import Set, Hashable
+from murasyp import _make_rational
+from murasyp.gambles import Gamble
+
+_spaces = {} # states -> (states, bit positions, frozenset of states)
+
+def _space(states):
+    """The interned possibility space of a sequence of states"""
+    states = tuple(states)
+    if states not in _spaces:
+        index = {x: i for i, x in enumerate(states)}
+        if len(index) != len(states):
+            raise ValueError("the states " + repr(states) + " are not distinct")
+        _spaces[states] = (states, index, frozenset(states))
+    return _spaces[states]
+
+class Event(Set, Hashable):
+    """An event, i.e., a set of states of a possibility space
+
+      :arg `states`: the states of the possibility space, in the order of the
+        bits of the bitmask
+      :type `states`: :class:`~collections.Sequence`
+      :arg `data`: the states of the event, or its bitmask
+      :type `data`: :class:`~collections.Iterable` or :class:`int`
+
+    >>> Event('abcd', 'ac')
+    Event(('a', 'b', 'c', 'd'), ('a', 'c'))
+    >>> Event('abcd', 6)
+    Event(('a', 'b', 'c', 'd'), ('b', 'c'))
+    >>> Event('abc', 'd')
+    Traceback (most recent call last):
+      ...
+    ValueError: 'd' is not a state of ('a', 'b', 'c')
+
+    This class derives from :class:`~collections.Set`, so events can be used
+    wherever sets of states are, and they are equal to and hash like the
+    :class:`frozenset` of their states.
+
+    What has changed:
+
+    * Union, intersection, difference, symmetric difference, inclusion and
+      equality of events of the same possibility space work on their bitmasks;
+      with other sets, the result is a :class:`frozenset`.
+
+      >>> E, F = Event('abcd', 'ac'), Event('abcd', 'cd')
+      >>> E | F, E & F, E - F, E ^ F
+      (Event(('a', 'b', 'c', 'd'), ('a', 'c', 'd')), Event(('a', 'b', 'c', 'd'), ('c',)), Event(('a', 'b', 'c', 'd'), ('a',)), Event(('a', 'b', 'c', 'd'), ('a', 'd')))
+      >>> E & {'a', 'b'}
+      frozenset(['a'])
+      >>> E & F <= E
+      True
+
+    * The complement with respect to the possibility space is taken with
+      ``~``.
+
+      >>> ~E
+      Event(('a', 'b', 'c', 'd'), ('b', 'd'))
+
+    * Its indicator on the possibility space is a sparse
+      :class:`~murasyp.gambles.Gamble`.
+
+      >>> E.indicator()
+      Gamble({'a': 1, 'c': 1, 'b': 0, 'd': 0})
+
+    """
+
+    def __init__(self, states, data=()):
+        """Create an event"""
+        self._space = _space(states)
+        if isinstance(data, (int, long)):
+            if not 0 <= data < 1 << len(self._space[0]):
+                raise ValueError(repr(data) + " is not a bitmask of "
+                                 + repr(self._space[0]))
+            self.mask = data
+        else:
+            index = self._space[1]
+            mask = 0
+            for x in data:
+                if x not in index:
+                    raise ValueError(repr(x) + " is not a state of "
+                                     + repr(self._space[0]))
+                mask |= 1 << index[x]
+            self.mask = mask
+
+    @classmethod
+    def _from_mask(cls, space, mask):
+        """Create an event of an interned possibility space from its
+        bitmask"""
+        event = cls.__new__(cls)
+        event._space = space
+        event.mask = mask
+        return event
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        """Results of operations with other sets are frozensets"""
+        return frozenset(iterable)
+
+    @property
+    def states(self):
+        """The states of the possibility space, in the order of the bits"""
+        return self._space[0]
+
+    def __len__(self):
+        """The number of states"""
+        return bin(self.mask).count('1')
+
+    def __iter__(self):
+        """Iterate over the states, in the order of the bits"""
+        mask = self.mask
+        for x in self._space[0]:
+            if mask & 1:
+                yield x
+            mask >>= 1
+            if mask == 0:
+                break
+
+    def __contains__(self, x):
+        """Membership, looking up the bit of the state"""
+        i = self._space[1].get(x)
+        return i is not None and self.mask >> i & 1 == 1
+
+    def __hash__(self):
+        """Hash, which is that of the frozenset of the states"""
+        if '_hash' not in self.__dict__:
+            self._hash = hash(frozenset(self))
+        return self._hash
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return (type(self).__name__ + '(' + repr(self._space[0]) + ', '
+                + repr(tuple(self)) + ')')
+
+    def __reduce__(self):
+        """Pickle as the states and the bitmask"""
+        return (type(self), (self._space[0], self.mask))
+
+    def _same_space(self, other):
+        return isinstance(other, Event) and other._space is self._space
+
+    def __eq__(self, other):
+        if self._same_space(other):
+            return self.mask == other.mask
+        return Set.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __le__(self, other):
+        if self._same_space(other):
+            return self.mask & ~other.mask == 0
+        return Set.__le__(self, other)
+
+    def __ge__(self, other):
+        if self._same_space(other):
+            return other.mask & ~self.mask == 0
+        return Set.__ge__(self, other)
+
+    def __lt__(self, other):
+        return self <= other and self != other
+
+    def __gt__(self, other):
+        return self >= other and self != other
+
+    def __and__(self, other):
+        if self._same_space(other):
+            return self._from_mask(self._space, self.mask & other.mask)
+        return Set.__and__(self, other)
+
+    def __or__(self, other):
+        if self._same_space(other):
+            return self._from_mask(self._space, self.mask | other.mask)
+        return Set.__or__(self, other)
+
+    def __sub__(self, other):
+        if self._same_space(other):
+            return self._from_mask(self._space, self.mask & ~other.mask)
+        return Set.__sub__(self, other)
+
+    def __xor__(self, other):
+        if self._same_space(other):
+            return self._from_mask(self._space, self.mask ^ other.mask)
+        return Set.__xor__(self, other)
+
+    __rand__ = lambda self, other: frozenset(other) & frozenset(self)
+    __ror__ = lambda self, other: frozenset(other) | frozenset(self)
+    __rsub__ = lambda self, other: frozenset(other) - frozenset(self)
+    __rxor__ = lambda self, other: frozenset(other) ^ frozenset(self)
+
+    def __invert__(self):
+        """Complement with respect to the possibility space"""
+        return self._from_mask(self._space,
+                               ((1 << len(self._space[0])) - 1) ^ self.mask)
+
+    def indicator(self):
+        """The indicator of the event on the possibility space
+
+          :rtype: :class:`~murasyp.gambles.Gamble`, in sparse mode
+
+        """
+        one = _make_rational(1)
+        return Gamble._from_sparse({x: one for x in self}, self._space[2])
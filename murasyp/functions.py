@@ -1,5 +1,5 @@
 from collections import Mapping
-from murasyp import _make_rational
+from murasyp import _make_rational, _as_fraction
 
 class Function(Mapping):
     """Rational-valued functions
@@ -24,6 +24,12 @@ class Function(Mapping):
         No floats are ever really used; they are immediately converted to
         fractions and should be seen as just a convenient input representation.
 
+      .. note::
+
+        Internally, values are stored as :class:`gmpy2.mpq` if :mod:`gmpy2`
+        is installed, which makes exact arithmetic much faster; values are
+        always handed out as :class:`~fractions.Fraction`.
+
     * Scalar multiplication (and division) as well as pointwise addition and
       subtraction is possible.
 
@@ -50,7 +56,7 @@ class Function(Mapping):
     __len__ = lambda self: len(self._mapping)
     __iter__ = lambda self: iter(self._mapping)
     __contains__ = lambda self, element: element in self._mapping
-    __getitem__ = lambda self, element: self._mapping[element]
+    __getitem__ = lambda self, element: _as_fraction(self._mapping[element])
 
     def __repr__(self):
         """Return a readable string representation"""
@@ -60,7 +66,7 @@ class Function(Mapping):
                          for arg, val in self._mapping.iteritems())
                 + '})')
 
-    __str__ = lambda self: str(self._mapping)
+    __str__ = lambda self: str(dict(self.iteritems()))
 
     def domain(self):
         """Domain of the function
@@ -86,7 +92,8 @@ class Function(Mapping):
         frozenset([Fraction(0, 1), Fraction(1, 1), Fraction(-1, 1)])
 
         """
-        return frozenset(self.itervalues())
+        return frozenset(_as_fraction(value)
+                         for value in self._mapping.itervalues())
 
     def support(self):
         """Support of the function
@@ -99,11 +106,13 @@ class Function(Mapping):
         frozenset(['a', 'b'])
 
         """
-        return frozenset(arg for arg, value in self.iteritems() if value != 0)
+        return frozenset(arg for arg, value in self._mapping.iteritems()
+                             if value != 0)
 
     def __add__(self, other):
         """Pointwise addition of rational-valued functions"""
-        return type(self)({arg: self[arg] + other[arg]
+        return type(self)({arg: self._mapping.get(arg, 0)
+                                + other._mapping.get(arg, 0)
                            for arg in self._domain_joiner(other)})
 
     def _domain_joiner(self, other):
@@ -118,13 +127,13 @@ class Function(Mapping):
         """Scalar multiplication of rational-valued functions"""
         other = _make_rational(other)
         return type(self)({arg: value * other
-                           for arg, value in self.iteritems()})
+                           for arg, value in self._mapping.iteritems()})
 
     def __div__(self, other):
         """Scalar division of rational-valued functions"""
         other = _make_rational(other)
         return type(self)({arg: value / other
-                           for arg, value in self.iteritems()})
+                           for arg, value in self._mapping.iteritems()})
 
     __rmul__ = __mul__
     __neg__ = lambda self: self * (-1)
@@ -1,6 +1,6 @@
-from collections import Set, Mapping
+from collections import Set, Mapping, Sequence
 from murasyp import _make_rational
-from murasyp.vectors import Vector, Polytope
+from murasyp.vectors import Vector, Polytope, _from_array, _to_array
 
 class Gamble(Vector):
     """Gambles map states to utility payoffs
@@ -30,6 +30,16 @@ class Gamble(Vector):
       >>> -3 - f
       Gamble({'a': '-41/10', 'c': -3, 'b': '-5/2'})
 
+    * Sparse gambles store only their nonzero values (see
+      :class:`~murasyp.vectors.Vector`).
+
+      >>> f = Gamble({'a': 1.1, 'b': '-1/2', 'c': 0}).sparse()
+      >>> g = Gamble({'b': '.6', 'c': -2, 'd': 0.0}).sparse()
+      >>> f * g == (f.dense() * g.dense())
+      True
+      >>> (-3 - f).is_sparse()
+      True
+
     * A gamble's domain can be cylindrically extended to the cartesian product
       of its domain and a specified :class:`~collections.Set`.
 
@@ -49,10 +59,15 @@ class Gamble(Vector):
         """Also allow addition of gambles and scalars"""
         if isinstance(other, Gamble):
             return Vector.__add__(self, other)
+        elif self.is_sparse():
+            other = _make_rational(other)
+            values = ((x, self._mapping.get(x, 0) + other) for x in self._domain)
+            return self._from_sparse({x: val for x, val in values if val != 0},
+                                     self._domain)
         else:
             other = _make_rational(other)
             return type(self)({arg: value + other
-                               for arg, value in self.iteritems()})
+                               for arg, value in self._mapping.iteritems()})
 
     __radd__ = __add__
     __rsub__ = lambda self, other: -(self - other)
@@ -60,7 +75,14 @@ class Gamble(Vector):
     def __mul__(self, other):
         """Pointwise multiplication of gambles"""
         if isinstance(other, Gamble):
-            return type(self)({x: self[x] * other[x]
+            if self.is_sparse() or other.is_sparse():
+                domain = self._sparse_domain(other)
+                values = ((x, val * other._mapping.get(x, 0)) for x, val
+                          in self._mapping.iteritems())
+                return self._from_sparse({x: val for x, val in values
+                                                 if val != 0}, domain)
+            return type(self)({x: self._mapping.get(x, 0)
+                                  * other._mapping.get(x, 0)
                                for x in self._domain_joiner(other)})
         else:
             return Vector.__mul__(self, other)
@@ -68,7 +90,8 @@ class Gamble(Vector):
     def __xor__(self, other):
         """Cylindrical extension"""
         if isinstance(other, Set):
-            return type(self)({(x, y): self[x] for x in self for y in other})
+            return type(self)({(x, y): self._mapping.get(x, 0)
+                               for x in self for y in other})
         else:
             raise TypeError("the argument must be a Set")
 
@@ -189,6 +212,12 @@ class Ray(Gamble):
         else:
             Gamble.__init__(self, gamble | gamble.support())
 
+    @classmethod
+    def _from_sparse(cls, values, domain):
+        """Rays are never sparse, as their domain coincides with their
+        support"""
+        return cls(values)
+
     def __mul__(self, other):
         """Multiplication of rays (and other types)"""
         self = Gamble(self)
@@ -215,24 +244,115 @@ class Cone(Polytope):
       >>> Cone('abc')
       Cone([Ray({'a': 1}), Ray({'b': 1}), Ray({'c': 1})])
       >>> Cone({'ab', 'bc'})
-      Cone([Ray({'c': 1, 'b': 1}), Ray({'a': 1, 'b': 1})])
+      Cone([Ray({'a': 1, 'b': 1}), Ray({'c': 1, 'b': 1})])
+      >>> Cone([{'a': 1, 'b': 2}, {'a': 2, 'b': 4}]) # the same ray
+      Cone([Ray({'a': '1/2', 'b': 1})])
+
+    Cones (and polytopes) are pickled compactly, using a table of the states
+    and integer numerators and denominators, and are unpickled without
+    normalizing the rays again.
+
+      >>> import pickle
+      >>> C = Cone({'ab', 'bc'})
+      >>> pickle.loads(pickle.dumps(C, 2)) == C
+      True
 
     This class derives from :class:`~murasyp.vectors.Polytope`, so its methods
     apply here as well.
 
-      .. todo::
+    """
+
+    _element = Ray
+
 
-        test all set methods and fix, or elegantly deal with, broken ones
+class GambleBatch(Sequence):
+    """A sequence of gambles on a common possibility space
+
+      :arg `pspace`: the possibility space, in the order of the columns
+      :type `pspace`: :class:`~collections.Sequence`
+      :arg `values`: the values of the gambles, one row per gamble
+      :type `values`: a two-dimensional :class:`numpy.ndarray` or
+        :class:`~collections.Sequence` of rows of representations of
+        :class:`~numbers.Real`
+
+      >>> import numpy
+      >>> F = GambleBatch('abc', numpy.array([[1, 0, -1], [.5, .5, 0]]))
+      >>> F
+      GambleBatch(('a', 'b', 'c'), [[1, 0, -1], ['1/2', '1/2', 0]])
+      >>> F[1]
+      Gamble({'a': '1/2', 'c': 0, 'b': '1/2'})
+      >>> F.to_array().tolist()
+      [[1.0, 0.0, -1.0], [0.5, 0.5, 0.0]]
+
+    The values are converted once for the whole batch and the gambles are
+    only created when they are accessed. This class derives from
+    :class:`~collections.Sequence`, so its methods apply here as well.
 
     """
-    def __new__(cls, data=[]):
-        """Create a frozenset of rays"""
-        if isinstance(data, Mapping):
-            raise TypeError(str(cls) + " does not accept a mapping,"
-                            + " but you passed it " + str(data))
-        else:
-            return frozenset.__new__(cls, (Ray(element) for element in data))
 
-    def __init__(self, data=[]): # only here for Sphinx to pick up the argument
-        """Initialize the cone"""
-        pass
+    def __init__(self, pspace, values):
+        """Create a batch of gambles"""
+        self.pspace = tuple(pspace)
+        self._rows = _from_array(values)
+        if (len(self._rows) > 0
+            and not (isinstance(self._rows[0], list)
+                     and all(len(row) == len(self.pspace)
+                             for row in self._rows))):
+            raise ValueError("specify one row of " + str(len(self.pspace))
+                             + " values per gamble")
+
+    @classmethod
+    def from_gambles(cls, gambles, pspace=None):
+        """Create a batch of gambles from gambles
+
+          :type `gambles`: :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Gamble`
+          :arg `pspace`: the possibility space, which defaults to the sorted
+            union of the gambles' domains; values outside a gamble's domain
+            are zero
+          :type `pspace`: :class:`~collections.Sequence`
+          :rtype: :class:`~murasyp.gambles.GambleBatch`
+
+        >>> GambleBatch.from_gambles([Gamble('a'), Gamble('bc')]).pspace
+        ('a', 'b', 'c')
+
+        """
+        gambles = list(gambles)
+        if pspace is None:
+            pspace = sorted(frozenset().union(*(f.domain() for f in gambles)))
+        batch = cls.__new__(cls)
+        batch.pspace = tuple(pspace)
+        batch._rows = [[f._mapping.get(x, 0) for x in batch.pspace]
+                       for f in gambles]
+        return batch
+
+    __len__ = lambda self: len(self._rows)
+
+    def __getitem__(self, index):
+        """The gamble with the given index, or a batch for a slice"""
+        if isinstance(index, slice):
+            batch = type(self).__new__(type(self))
+            batch.pspace = self.pspace
+            batch._rows = self._rows[index]
+            return batch
+        gamble = Gamble.__new__(Gamble)
+        gamble._mapping = dict(zip(self.pspace, self._rows[index]))
+        return gamble
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return (type(self).__name__ + '(' + repr(self.pspace) + ', ['
+                + ', '.join('[' + ', '.join(repr(str(val)) if '/' in str(val)
+                                            else str(val) for val in row)
+                            + ']' for row in self._rows)
+                + '])')
+
+    def to_array(self, dtype=float):
+        """The values of the gambles as the rows of a NumPy array
+
+          :arg `dtype`: the data type of the array; for ``object``, the
+            elements are :class:`~fractions.Fraction`
+          :rtype: :class:`numpy.ndarray`
+
+        """
+        return _to_array(self, self.pspace, dtype)
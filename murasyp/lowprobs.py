@@ -0,0 +1,499 @@
+from collections import Mapping, Sequence
+from murasyp import _make_rational, _as_fraction
+from murasyp.vectors import Vector
+from murasyp.massfuncs import PMFunc
+from murasyp.gambles import Gamble
+import murasyp.credalsets
+import murasyp.desirs
+import murasyp.setfuncs
+
+class LowerProb(object):
+    """Two-monotone lower probabilities
+
+      :type `data`: a :class:`~collections.Mapping` of events, i.e.,
+        :class:`~collections.Hashable` :class:`~collections.Container`\ s of
+        states, to a representation of :class:`~numbers.Real`
+
+      >>> P = LowerProb({'a': .1, 'b': .2, 'c': .3,
+      ...                'ab': .4, 'ac': .5, 'bc': .6})
+      >>> P.lower_pr('ab')
+      Fraction(2, 5)
+      >>> P.upper_pr('ab')
+      Fraction(7, 10)
+
+    The possibility space is the union of the events; the empty event and the
+    possibility space itself have lower probability zero and one, and the lower
+    probability of any other unspecified event is the largest one of its
+    specified subevents.
+
+      >>> LowerProb({'a': .5, 'b': .8})
+      Traceback (most recent call last):
+        ...
+      ValueError: the lower probability is not 2-monotone
+
+    Features:
+
+    * Lower and upper (conditional) expectations can be calculated, using the
+      ``*`` and ``**`` operators, respectively. For 2-monotone lower
+      probabilities, the lower expectation of a gamble is its Choquet integral,
+      which only needs a sort of the gamble's values, so neither a linear
+      program nor a vertex enumeration is needed.
+
+      >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+      >>> P * f
+      Fraction(-1, 5)
+      >>> P ** f
+      Fraction(2, 5)
+      >>> P.lower_expectations([f, -f])
+      [Fraction(-1, 5), Fraction(-2, 5)]
+      >>> P.check_lower_bounds([(f, '-1/5'), (-f, 0)])
+      [True, False]
+
+      .. note::
+
+          The domain of the gamble determines the conditioning event;
+          conditional expectations are calculated using the corresponding
+          credal set.
+
+    * The corresponding credal set and set of desirable gambles are generated
+      (and stored) only when they are asked for.
+
+      >>> P.get_credal() * f == P * f
+      True
+
+    """
+    def __init__(self, data):
+        """Create a lower probability"""
+        if not isinstance(data, Mapping):
+            raise TypeError("specify a mapping")
+        data = {frozenset(event): _make_rational(value)
+                for event, value in data.iteritems()}
+        self._states = tuple(sorted(frozenset().union(*data)))
+        specified = {murasyp.setfuncs.event_mask(self._states, event): value
+                     for event, value in data.iteritems()}
+        specified[0] = 0
+        specified[(1 << len(self._states)) - 1] = 1
+        values = [0] * (1 << len(self._states))
+        for mask in range(len(values)):
+            values[mask] = max([specified.get(mask, 0)]
+                               + [values[mask ^ (1 << i)]
+                                  for i in range(len(self._states))
+                                  if mask & (1 << i)])
+        if not murasyp.setfuncs.is_2monotone(values):
+            raise ValueError("the lower probability is not 2-monotone")
+        self._values = values
+        self._credal = None
+
+    def pspace(self):
+        """The possibility space of the lower probability
+
+          :rtype: :class:`frozenset`
+
+        """
+        return frozenset(self._states)
+
+    def lower_pr(self, event):
+        """Lower probability of an event
+
+          :type `event`: :class:`~collections.Container` of states
+          :rtype: :class:`~fractions.Fraction`
+
+        """
+        return _as_fraction(
+                   self._values[murasyp.setfuncs.event_mask(self._states, event)])
+
+    def upper_pr(self, event):
+        """Upper probability of an event
+
+          :type `event`: :class:`~collections.Container` of states
+          :rtype: :class:`~fractions.Fraction`
+
+        """
+        full = (1 << len(self._states)) - 1
+        return 1 - _as_fraction(self._values[
+            full ^ murasyp.setfuncs.event_mask(self._states, event)])
+
+    def _is_unconditional(self, gamble):
+        """Check whether the gamble's domain includes the possibility space"""
+        if isinstance(gamble, Gamble):
+            return self.pspace() <= gamble.domain()
+        else:
+            raise TypeError(str(gamble) + " is not a gamble")
+
+    def _choquet(self, gamble):
+        """Choquet integral of a gamble on the possibility space"""
+        ordered = sorted(self._states, key=lambda x: gamble[x], reverse=True)
+        value = gamble[ordered[-1]]
+        level = set()
+        for x, y in zip(ordered, ordered[1:]):
+            level.add(x)
+            if gamble[x] != gamble[y]:
+                value += (gamble[x] - gamble[y]) * self.lower_pr(level)
+        return value
+
+    def __mul__(self, other):
+        """Lower expectation of a gamble"""
+        if self._is_unconditional(other):
+            return _as_fraction(self._choquet(other))
+        else:
+            return self.get_credal() * other
+
+    def __pow__(self, other):
+        """Upper expectation of a gamble"""
+        return - self.__mul__(- other)
+
+    def lower_expectations(self, gambles):
+        """Lower expectations of a number of gambles
+
+          :type `gambles`: :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Gamble`
+          :rtype: :class:`list`
+
+        """
+        return [self * gamble for gamble in gambles]
+
+    def upper_expectations(self, gambles):
+        """Upper expectations of a number of gambles
+
+          :type `gambles`: :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Gamble`
+          :rtype: :class:`list`
+
+        """
+        return [self ** gamble for gamble in gambles]
+
+    def lower_at_least(self, gamble, threshold):
+        """Check whether the lower expectation of a gamble is at least a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        """
+        return self * gamble >= _make_rational(threshold)
+
+    def upper_at_most(self, gamble, threshold):
+        """Check whether the upper expectation of a gamble is at most a
+        threshold
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :type `threshold`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`bool`
+
+        """
+        return self ** gamble <= _make_rational(threshold)
+
+    def check_lower_bounds(self, pairs):
+        """Check lower expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :rtype: :class:`list` of :class:`bool`
+
+        """
+        return [self.lower_at_least(gamble, threshold)
+                for gamble, threshold in pairs]
+
+    def check_upper_bounds(self, pairs):
+        """Check upper expectation thresholds for a number of gambles
+
+          :type `pairs`: :class:`~collections.Iterable` of pairs of a
+            :class:`~murasyp.gambles.Gamble` and a representation of
+            :class:`~numbers.Real`
+          :rtype: :class:`list` of :class:`bool`
+
+        """
+        return [self.upper_at_most(gamble, threshold)
+                for gamble, threshold in pairs]
+
+    def get_desir(self):
+        """Generate the corresponding open set of desirable gambles
+
+          :returns: the set of desirable gambles that corresponds as an
+            uncertainty model
+          :rtype: :class:`~murasyp.desirs.DesirSet`
+
+        """
+        pspace = self.pspace()
+        D = murasyp.desirs.DesirSet()
+        for mask in range(1, len(self._values) - 1):
+            event = murasyp.setfuncs.mask_event(self._states, mask)
+            D.set_lower_pr(Gamble(event) | pspace, self._values[mask])
+        return D
+
+    def get_credal(self):
+        """Generate the corresponding (closed) credal set
+
+          :returns: the (closed) credal set that corresponds as an uncertainty
+            model
+          :rtype: :class:`~murasyp.credalsets.CredalSet`
+
+        The credal set is generated when first asked for and stored; a copy
+        is returned.
+
+        """
+        if self._credal is None:
+            D = self.get_desir() | murasyp.desirs.DesirSet(self.pspace())
+            self._credal = D.get_credal()
+        return murasyp.credalsets.CredalSet(self._credal)
+
+
+class ProbIntervals(LowerProb):
+    """Probability intervals
+
+      :type `lower`: a :class:`~collections.Mapping` of states to a
+        representation of :class:`~numbers.Real`
+      :type `upper`: a :class:`~collections.Mapping` of states to a
+        representation of :class:`~numbers.Real`
+
+    Bounds that cannot be reached are tightened.
+
+      >>> P = ProbIntervals({'a': .1, 'b': .2, 'c': .3},
+      ...                   {'a': .5, 'b': .6, 'c': .9})
+      >>> P
+      ProbIntervals({'a': '1/10', 'c': '3/10', 'b': '1/5'}, {'a': '1/2', 'c': '7/10', 'b': '3/5'})
+      >>> ProbIntervals({'a': .5, 'b': .6}, {'a': 1, 'b': 1})
+      Traceback (most recent call last):
+        ...
+      ValueError: the probability intervals incur sure loss
+
+    This class derives from :class:`~murasyp.lowprobs.LowerProb`, so its
+    methods apply here as well; the lower expectation of a gamble is the
+    expectation of the probability mass function that starts from the lower
+    bounds and assigns the remaining mass to the lowest payoffs first.
+
+      >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+      >>> P * f
+      Fraction(-3, 10)
+      >>> P.get_credal() * f
+      Fraction(-3, 10)
+
+    """
+    def __init__(self, lower, upper):
+        """Create probability intervals"""
+        if not (isinstance(lower, Mapping) and isinstance(upper, Mapping)):
+            raise TypeError("specify mappings")
+        self._states = tuple(sorted(frozenset(lower) | frozenset(upper)))
+        lower = {x: _make_rational(lower.get(x, 0)) for x in self._states}
+        upper = {x: _make_rational(upper.get(x, 1)) for x in self._states}
+        lsum = sum(lower.itervalues())
+        usum = sum(upper.itervalues())
+        if lsum > 1 or usum < 1 or any(lower[x] > upper[x] for x in lower):
+            raise ValueError("the probability intervals incur sure loss")
+        self._lower = {x: max(lower[x], 1 - usum + upper[x]) for x in lower}
+        self._upper = {x: min(upper[x], 1 - lsum + lower[x]) for x in upper}
+        self._credal = None
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return (type(self).__name__ + '(' + repr(_strvals(self._lower))
+                + ', ' + repr(_strvals(self._upper)) + ')')
+
+    def lower_pr(self, event):
+        """Lower probability of an event"""
+        event = frozenset(event)
+        return _as_fraction(max(sum(self._lower[x] for x in self._states
+                                                   if x in event),
+                                1 - sum(self._upper[x] for x in self._states
+                                                       if x not in event)))
+
+    def _choquet(self, gamble):
+        """Expectation of the lower-bounds-first mass function"""
+        mass = 1 - sum(self._lower.itervalues())
+        value = 0
+        for x in sorted(self._states, key=lambda x: gamble[x]):
+            extra = min(self._upper[x] - self._lower[x], mass)
+            mass -= extra
+            value += (self._lower[x] + extra) * gamble[x]
+        return value
+
+    def get_desir(self):
+        """Generate the corresponding open set of desirable gambles"""
+        pspace = self.pspace()
+        D = murasyp.desirs.DesirSet()
+        for x in self._states:
+            D.set_lower_pr(Gamble({x}) | pspace, self._lower[x])
+            D.set_upper_pr(Gamble({x}) | pspace, self._upper[x])
+        return D
+
+
+class PBox(LowerProb):
+    """Probability boxes on a totally ordered possibility space
+
+      :type `states`: a :class:`~collections.Sequence` of states, in
+        increasing order
+      :type `lower`: a :class:`~collections.Mapping` of states to a
+        representation of :class:`~numbers.Real`
+      :type `upper`: a :class:`~collections.Mapping` of states to a
+        representation of :class:`~numbers.Real`
+
+    The mappings give the lower and upper cumulative distribution functions,
+    i.e., the lower and upper probabilities of the events of all states up to
+    and including a given one. The cumulative distribution functions are one in
+    the last state.
+
+      >>> P = PBox('abc', {'a': .1, 'b': .4}, {'a': .3, 'b': .8})
+      >>> P
+      PBox(('a', 'b', 'c'), {'a': '1/10', 'c': 1, 'b': '2/5'}, {'a': '3/10', 'c': 1, 'b': '4/5'})
+      >>> PBox('ab', {'a': .5}, {'a': .4})
+      Traceback (most recent call last):
+        ...
+      ValueError: the cumulative distribution functions do not form a p-box
+
+    This class derives from :class:`~murasyp.lowprobs.LowerProb`, so its
+    methods apply here as well; the lower expectation of a gamble is a weighted
+    sum of its minima over the intervals that are the focal elements of the
+    p-box.
+
+      >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+      >>> P * f
+      Fraction(-1, 5)
+      >>> P.get_credal() * f
+      Fraction(-1, 5)
+      >>> P.lower_pr('ac')
+      Fraction(3, 10)
+
+    """
+    def __init__(self, states, lower, upper):
+        """Create a p-box"""
+        if not (isinstance(states, Sequence) and isinstance(lower, Mapping)
+                                             and isinstance(upper, Mapping)):
+            raise TypeError("specify a sequence and mappings")
+        self._states = tuple(states)
+        lower = [_make_rational(lower.get(x, 0)) for x in self._states[:-1]]
+        upper = [_make_rational(upper.get(x, 1)) for x in self._states[:-1]]
+        self._cdfs = (lower + [1], upper + [1])
+        if not all(0 <= lo <= up and lo <= nlo and up <= nup
+                   for lo, up, nlo, nup in zip(self._cdfs[0], self._cdfs[1],
+                                               self._cdfs[0][1:],
+                                               self._cdfs[1][1:])):
+            raise ValueError("the cumulative distribution functions "
+                             "do not form a p-box")
+        self._credal = None
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return (type(self).__name__ + '(' + repr(self._states) + ', '
+                + ', '.join(repr(_strvals(dict(zip(self._states, cdf))))
+                            for cdf in self._cdfs) + ')')
+
+    def lower_pr(self, event):
+        """Lower probability of an event"""
+        event = frozenset(event)
+        value = 0
+        begin = None
+        for i, x in enumerate(self._states + (None,)):
+            if x in event and x is not None:
+                if begin is None:
+                    begin = i
+            elif begin is not None:
+                value += max(0, self._cdfs[0][i - 1]
+                                - (self._cdfs[1][begin - 1] if begin > 0
+                                                            else 0))
+                begin = None
+        return _as_fraction(value)
+
+    def _choquet(self, gamble):
+        """Weighted sum of the minima over the focal intervals"""
+        levels = sorted(frozenset(self._cdfs[0]) | frozenset(self._cdfs[1]))
+        value = 0
+        previous = 0
+        for level in levels:
+            if level > 0:
+                begin = min(i for i, up in enumerate(self._cdfs[1])
+                              if up >= level)
+                end = min(i for i, lo in enumerate(self._cdfs[0])
+                            if lo >= level)
+                value += (level - previous) * min(gamble[x] for x
+                                                  in self._states[begin:end+1])
+                previous = level
+        return value
+
+    def get_desir(self):
+        """Generate the corresponding open set of desirable gambles"""
+        pspace = self.pspace()
+        D = murasyp.desirs.DesirSet()
+        for i in range(len(self._states) - 1):
+            event = Gamble(self._states[:i+1]) | pspace
+            D.set_lower_pr(event, self._cdfs[0][i])
+            D.set_upper_pr(event, self._cdfs[1][i])
+        return D
+
+
+class LinearVacuous(LowerProb):
+    """Linear-vacuous mixtures, or epsilon-contamination models
+
+      :type `data`: arguments accepted by the
+        :class:`~murasyp.massfuncs.PMFunc` constructor
+      :type `epsilon`: a representation of :class:`~numbers.Real` between zero
+        and one
+
+    The vacuous model on the domain of the probability mass function is mixed
+    in with weight `epsilon`.
+
+      >>> P = LinearVacuous({'a': .2, 'b': .3, 'c': .5}, .1)
+      >>> P
+      LinearVacuous(PMFunc({'a': '1/5', 'c': '1/2', 'b': '3/10'}), '1/10')
+      >>> P.lower_pr('ab')
+      Fraction(9, 20)
+
+    This class derives from :class:`~murasyp.lowprobs.LowerProb`, so its
+    methods apply here as well; the lower expectation of a gamble is the
+    mixture of its expectation and its minimum.
+
+      >>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+      >>> P * f
+      Fraction(-1, 100)
+      >>> P.get_credal() * f
+      Fraction(-1, 100)
+
+    """
+    def __init__(self, data, epsilon):
+        """Create a linear-vacuous mixture"""
+        self._pmfunc = PMFunc(data)
+        self._epsilon = _make_rational(epsilon)
+        if not 0 <= self._epsilon <= 1:
+            raise ValueError("the mixture weight must lie between 0 and 1")
+        self._states = tuple(sorted(self._pmfunc.domain()))
+        self._credal = None
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        epsilon = str(self._epsilon)
+        return (type(self).__name__ + '(' + repr(self._pmfunc) + ', '
+                + (repr(epsilon) if '/' in epsilon else epsilon) + ')')
+
+    def lower_pr(self, event):
+        """Lower probability of an event"""
+        event = frozenset(event)
+        if self.pspace() <= event:
+            return 1
+        else:
+            return _as_fraction((1 - self._epsilon)
+                                * sum(self._pmfunc[x] for x in event))
+
+    def _choquet(self, gamble):
+        """Mixture of the expectation and the minimum"""
+        return ((1 - self._epsilon) * sum(self._pmfunc[x] * gamble[x]
+                                          for x in self._states)
+                + self._epsilon * min(gamble[x] for x in self._states))
+
+    def get_desir(self):
+        """Generate the corresponding open set of desirable gambles"""
+        return self.get_credal().get_desir()
+
+    def get_credal(self):
+        """Generate the corresponding (closed) credal set"""
+        if self._credal is None:
+            self._credal = murasyp.credalsets.CredalSet(
+                  (1 - self._epsilon) * self._pmfunc
+                  + self._epsilon * Vector({x: 1}) for x in self._states)
+        return murasyp.credalsets.CredalSet(self._credal)
+
+
+def _strvals(mapping):
+    """Values as strings where the repr of a fraction would be unwieldy"""
+    return {arg: (str(value) if '/' in str(value) else _as_fraction(value))
+            for arg, value in mapping.iteritems()}
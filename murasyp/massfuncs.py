@@ -1,6 +1,5 @@
 from collections import Set, Mapping
-from fractions import Fraction
-from murasyp import _make_rational
+from murasyp import _make_rational, _as_fraction
 from murasyp.vectors import Vector
 from murasyp.gambles import Gamble
 
@@ -83,18 +82,40 @@ class UMFunc(Vector):
                                 + str(data) + " with a total mass of zero")
             Vector.__init__(self, umfunc | umfunc.support())
         else: # uniform over Hashable Container
-            Vector.__init__(self, {component: Fraction(1, len(data))
-                                   for component in data})
+            mass = 1 / _make_rational(len(data))
+            Vector.__init__(self, {component: mass for component in data})
 
     def __or__(self, other):
         """Mass function conditional on the given event"""
+        if isinstance(other, Set): # renormalize the restriction directly
+            mass = {x: val for x, val in self._mapping.iteritems()
+                           if x in other}
+            total = sum(mass.itervalues())
+            if total == 0:
+                self._zero_mass(other)
+            umfunc = type(self).__new__(type(self))
+            umfunc._mapping = {x: val / total for x, val in mass.iteritems()}
+            return umfunc
         return type(self)(Vector(self) | other)
 
+    def _zero_mass(self, event):
+        """Raise the error of conditioning on an event of zero mass"""
+        raise ValueError("no UMFunc can be constructed from a Mapping "
+                         + str(Vector(self) | event)
+                         + " with a total mass of zero")
+
     def __mul__(self, other):
         """'Expectation' of a gamble"""
-        if isinstance(other, Gamble):
-            pspace = self.domain() & other.domain()
-            return sum((self | pspace)[x] * other[x] for x in pspace)
+        if isinstance(other, Gamble): # conditional on the gamble's domain
+            total = weighted = 0
+            values = other._mapping
+            for x, val in self._mapping.iteritems():
+                if x in other:
+                    total += val
+                    weighted += val * values.get(x, 0)
+            if total == 0:
+                self._zero_mass(other.domain())
+            return _as_fraction(weighted / total)
         else:
             return Vector(self) * other
 
@@ -1,7 +1,377 @@
+"""Linear programs are solved and polyhedra are enumerated by a backend.
+
+The backend can be chosen per call, using the `backend` argument of the
+functions below, or per model, by setting the `backend` attribute of a
+:class:`~murasyp.credalsets.CredalSet` or :class:`~murasyp.desirs.DesirSet`.
+It is given as one of the names in :data:`backends` or as an
+:class:`LPBackend` instance; ``None`` selects :data:`default_backend`.
+
+>>> 'cdd' in backends and 'cdd-float' in backends
+True
+
+The solver libraries (and NumPy) are only imported once they are first
+used, so importing :mod:`murasyp` or any of its modules does not load them:
+
+>>> import subprocess, sys
+>>> for module in ['murasyp', 'murasyp.gambles', 'murasyp.credalsets',
+...                'murasyp.desirs', 'murasyp.lowprobs', 'murasyp.mathprog',
+...                'murasyp.symmetry', 'murasyp.events', 'murasyp.decisions',
+...                'murasyp.cache', 'murasyp.cli', 'murasyp.server',
+...                'murasyp.counters', 'murasyp.precision']:
+...     print subprocess.check_output([sys.executable, '-c',
+...         'import sys, ' + module + '; print sorted(set(["cdd", "scipy", '
+...         '"numpy"]) & set(sys.modules))'
+...     ]).strip(),
+[] [] [] [] [] [] [] [] [] [] [] [] [] []
+
+All registered backends agree on the models of the documentation's
+examples; a registered backend that cannot be used raises an error here
+instead of being skipped. The ``'highs'`` backend (see
+:class:`HighsBackend`) needs SciPy 1.6 or later, and so Python 3.7 or
+later, which this package does not support, so it is never registered and
+only the pycddlib backends are compared:
+
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.massfuncs import PMFunc
+>>> from murasyp.credalsets import CredalSet
+>>> from murasyp.desirs import DesirSet
+>>> D = DesirSet([[Gamble({'a': -1, 'c': '7/90'}),
+...                Gamble({'a': 1, 'c': '-1/30'}),
+...                Gamble({'a': -1, 'c': '1/9', 'b': -1}),
+...                Gamble({'a': 1, 'c': '-1/9', 'b': 1})]])
+>>> E = DesirSet()
+>>> E.set_pr('a', 1)
+>>> E.set_pr(Gamble('b') | {'b', 'c'}, '1/2')
+>>> F = DesirSet(['abc'])
+>>> F.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, .5)
+>>> K = CredalSet('abc')
+>>> K.add({'a': 1, 'b': 1, 'c': 1})
+>>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+>>> def queries(backend):
+...     D.backend = E.backend = F.backend = K.backend = backend
+...     L = CredalSet(K)
+...     L.backend = backend
+...     L.discard_redundant()
+...     return [D * f, D ** f, D * (f | f.support()),
+...             E * (Gamble('c') | {'b', 'c'}), D.asl(), D.apl(),
+...             F.get_credal(), L, L.get_desir()]
+>>> answers = {backend: queries(backend) for backend in backends}
+>>> sorted(answers)
+['cdd', 'cdd-float']
+>>> all(answer == answers['cdd'] for answer in answers.values())
+True
+
+"""
+
+import abc
+import imp
+import sys
+from fractions import Fraction
+from murasyp import _make_rational, _as_fraction
 from murasyp.vectors import Vector, Polytope
-from cdd import Matrix, RepType, Polyhedron, LPObjType, LinProg, LPStatusType
+import murasyp.cache
+
+class LPBackend(object):
+    """Interface of linear programming and polyhedral computation backends
+
+    Constraints are given as rows :math:`(b, a)` of the system
+    :math:`b + a\cdot x \geq 0`, or :math:`b + a\cdot x = 0` for the rows
+    listed among the equalities, and objectives as a row :math:`(c_0, c)` of
+    the function :math:`c_0 + c\cdot x`.
+
+    Backends must implement :meth:`maximize`; a backend class that does not
+    cannot be instantiated:
+
+    >>> class Incomplete(LPBackend):
+    ...     pass
+    >>> Incomplete()
+    Traceback (most recent call last):
+      ...
+    TypeError: Can't instantiate abstract class Incomplete with abstract methods maximize
+
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def maximize(self, equalities, inequalities, objective):
+        """Maximize a linear objective function
+
+          :returns: the status (``'optimal'``, ``'inconsistent'``,
+            ``'unbounded'``, or ``'undecided'``), the optimal value and an
+            optimal solution
+          :rtype: a triple (:class:`tuple`)
+
+        """
+
+    def maximize_batch(self, equalities, inequalities, objective, constants):
+        """Maximize a linear objective function for a number of right-hand
+        sides of the equalities
+
+          :arg `constants`: for each linear program, the constants :math:`b`
+            replacing those of the equalities
+          :type `constants`: :class:`~collections.Iterable` of rows
+          :returns: for each linear program, the triple of :meth:`maximize`
+          :rtype: :class:`list`
+
+        Backends can override this to set up the shared constraints only once.
+
+        """
+        return [self.maximize([[b] + row[1:]
+                               for b, row in zip(column, equalities)],
+                              inequalities, objective)
+                for column in constants]
+
+    def enumerate(self, inequalities):
+        """Enumerate the generators of a homogeneous polyhedral cone
+
+          :returns: the generators and the indices of the generators that
+            span a linear subspace
+          :rtype: a pair (:class:`tuple`) of a :class:`list` of rows and a
+            :class:`frozenset`
+
+        """
+        return backends['cdd'].enumerate(inequalities)
+
+    def generate(self, inequalities):
+        """Enumerate the generators of a homogeneous polyhedral cone one at a
+        time
+
+          :returns: the generators, each with whether it spans a linear
+            subspace
+          :rtype: an iterator of pairs (:class:`tuple`) of a row and a
+            :class:`bool`
+
+        Backends can override this to avoid creating all rows at once.
+
+        """
+        rows, lin_set = self.enumerate(inequalities)
+        for i, row in enumerate(rows):
+            yield row, i in lin_set
+
+    def redundant(self, generators):
+        """Find redundant generators of a polytope
+
+          :arg `generators`: rows :math:`(1, p)` of points :math:`p`
+          :returns: the indices of generators that are convex combinations of
+            the others
+          :rtype: :class:`frozenset`
+
+        """
+        red = set()
+        for i, point in enumerate(generators):
+            others = [row for j, row in enumerate(generators)
+                          if j != i and j not in red]
+            if others == []:
+                continue
+            equalities = [[-point[n]] + [row[n] for row in others]
+                          for n in range(len(point))]
+            inequalities = [[0] + [int(k == m) for k in range(len(others))]
+                            for m in range(len(others))]
+            status, value, solution = self.maximize(
+                equalities, inequalities, [0] * (len(others) + 1))
+            if status == 'optimal':
+                red.add(i)
+        return frozenset(red)
+
+
+class CddBackend(LPBackend):
+    """The backend using pycddlib, with exact or floating point arithmetic
+
+      :type `number_type`: ``'fraction'`` or ``'float'``
+
+    Floating point results are converted to fractions with denominators
+    bounded by :attr:`denominator`.
+
+    """
+    denominator = 10 ** 6
+
+    def __init__(self, number_type='fraction'):
+        """Create a backend with the given number type"""
+        self.number_type = number_type
+
+    def _matrix(self, equalities, inequalities):
+        from cdd import Matrix
+        rows = [list(self._number(x) for x in row) for row in inequalities]
+        mat = Matrix(rows, number_type=self.number_type)
+        if equalities != []:
+            mat.extend([[self._number(x) for x in row] for row in equalities],
+                       linear=True)
+        return mat
+
+    def _number(self, value):
+        if self.number_type == 'fraction':
+            return _as_fraction(value) # pycddlib only knows Fraction
+        else:
+            return float(value)
+
+    def _rational(self, value):
+        if self.number_type == 'fraction':
+            return value
+        else:
+            return Fraction(value).limit_denominator(self.denominator)
+
+    def maximize(self, equalities, inequalities, objective):
+        return self._solve(self._matrix(equalities, inequalities), objective)
+
+    def maximize_batch(self, equalities, inequalities, objective, constants):
+        # the inequalities are converted once and the matrix copied per program
+        base = self._matrix([], inequalities)
+        results = []
+        for column in constants:
+            mat = base.copy()
+            if equalities != []:
+                mat.extend([[self._number(b)]
+                            + [self._number(x) for x in row[1:]]
+                            for b, row in zip(column, equalities)],
+                           linear=True)
+            results.append(self._solve(mat, objective))
+        return results
+
+    def _solve(self, mat, objective):
+        from cdd import LPObjType, LinProg, LPStatusType
+        mat.obj_type = LPObjType.MAX
+        mat.obj_func = tuple(self._number(x) for x in objective)
+        lp = LinProg(mat)
+        lp.solve()
+        if lp.status == LPStatusType.OPTIMAL:
+            return ('optimal', self._rational(lp.obj_value),
+                    tuple(self._rational(x) for x in lp.primal_solution))
+        elif lp.status == LPStatusType.INCONSISTENT:
+            return ('inconsistent', None, None)
+        elif lp.status == LPStatusType.UNBOUNDED:
+            return ('unbounded', None, None)
+        else:
+            return ('undecided', None, None)
+
+    def enumerate(self, inequalities):
+        from cdd import RepType, Polyhedron
+        mat = self._matrix([], inequalities)
+        mat.rep_type = RepType.INEQUALITY
+        ext = Polyhedron(mat).get_generators()
+        return ([[self._rational(ext[i][j]) for j in range(ext.col_size)]
+                 for i in range(ext.row_size)], frozenset(ext.lin_set))
+
+    def generate(self, inequalities):
+        # pycddlib enumerates all generators at once, but in its own compact
+        # matrix, whose rows are only converted when they are needed
+        from cdd import RepType, Polyhedron
+        mat = self._matrix([], inequalities)
+        mat.rep_type = RepType.INEQUALITY
+        ext = Polyhedron(mat).get_generators()
+        lin_set = frozenset(ext.lin_set)
+        for i in range(ext.row_size):
+            yield ([self._rational(ext[i][j]) for j in range(ext.col_size)],
+                   i in lin_set)
+
+    def redundant(self, generators):
+        from cdd import RepType
+        mat = self._matrix([], generators)
+        mat.rep_type = RepType.GENERATOR
+        lin, red = mat.canonicalize()
+        return frozenset(red)
+
+
+class HighsBackend(LPBackend):
+    """The backend using SciPy's HiGHS solvers, with floating point arithmetic
+
+    Results are converted to fractions with denominators bounded by
+    :attr:`denominator`. Polyhedral enumeration is delegated to pycddlib.
+    A version of SciPy with the HiGHS solvers (1.6 or later) is needed;
+    whether it is installed is found out by the first solve, which removes
+    ``'highs'`` from :data:`backends` and raises a :class:`ValueError` if
+    it is not.
+
+    .. warning::
+
+      SciPy 1.6 needs Python 3.7 or later, so this backend is not
+      available, and has not been tested, with this package.
+
+    """
+    denominator = 10 ** 6
+    _linprog = None # SciPy's linprog, once it is known to have HiGHS
+
+    def _rational(self, value):
+        return Fraction(value).limit_denominator(self.denominator)
+
+    def maximize(self, equalities, inequalities, objective):
+        return self.maximize_batch(equalities, inequalities, objective,
+                                   [[row[0] for row in equalities]])[0]
+
+    def _solver(self):
+        if self._linprog is None:
+            try:
+                from scipy.optimize import linprog
+                linprog([0], bounds=[(0, 0)], method='highs')
+            except (ImportError, ValueError) as error: # e.g., Unknown solver
+                if backends.get('highs') is self:
+                    del backends['highs']
+                raise ValueError("SciPy's HiGHS solvers are unavailable: "
+                                 + str(error))
+            self._linprog = linprog
+        return self._linprog
+
+    def maximize_batch(self, equalities, inequalities, objective, constants):
+        linprog = self._solver()
+        n = len(objective) - 1
+        c = [-float(x) for x in objective[1:]]
+        A_ub = [[-float(a) for a in row[1:]] for row in inequalities] or None
+        b_ub = [float(row[0]) for row in inequalities] or None
+        A_eq = [[float(a) for a in row[1:]] for row in equalities] or None
+        return [self._result(linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq,
+                                     b_eq=[-float(b) for b in column] or None,
+                                     bounds=[(None, None)] * n,
+                                     method='highs'), objective)
+                for column in constants]
+
+    def _result(self, result, objective):
+        if result.status == 0:
+            return ('optimal', objective[0] + self._rational(-result.fun),
+                    tuple(self._rational(x) for x in result.x))
+        elif result.status == 2:
+            return ('inconsistent', None, None)
+        elif result.status == 3:
+            return ('unbounded', None, None)
+        else:
+            return ('undecided', None, None)
+
+
+backends = {'cdd': CddBackend('fraction'), 'cdd-float': CddBackend('float')}
+if sys.version_info >= (3, 7): # needed by SciPy 1.6, the first with HiGHS
+    try:
+        imp.find_module('scipy') # locate SciPy without importing it
+        backends['highs'] = HighsBackend()
+    except ImportError:
+        pass
+
+default_backend = 'cdd'
+
+def get_backend(backend=None):
+    """Resolve a backend specification
+
+      :type `backend`: a name in :data:`backends`, an :class:`LPBackend`, or
+        ``None`` for :data:`default_backend`
+      :rtype: :class:`LPBackend`
+
+    >>> get_backend('cdd-float').number_type
+    'float'
+
+    """
+    if backend is None:
+        backend = default_backend
+    if isinstance(backend, LPBackend):
+        return backend
+    elif backend in backends:
+        return backends[backend]
+    else:
+        raise ValueError("unknown backend " + repr(backend))
+
+def _backend_key(backend):
+    """What distinguishes the results of a backend, for cache keys"""
+    backend = get_backend(backend)
+    return (type(backend).__name__, getattr(backend, 'number_type', None),
+            getattr(backend, 'denominator', None))
 
-def vf_enumeration(data=[]):
+def vf_enumeration(data=[], backend=None):
     """Perform vertex/facet enumeration
 
       :type `data`: an argument accepted by the
@@ -11,24 +381,184 @@ def vf_enumeration(data=[]):
       facet/vertex-representation)
     :rtype: a :class:`~murasyp.vectors.Polytope`
 
+    The result is cached (see :mod:`murasyp.cache`).
+
+    """
+    vf_poly = Polytope(data)
+    return murasyp.cache.cached(
+        ('vf_enumeration', vf_poly, _backend_key(backend)),
+        lambda: _vf_enumeration(vf_poly, backend))
+
+def _vf_enumeration(vf_poly, backend):
+    ext, lin_set = get_backend(backend).enumerate(
+        [(0,) + row for row in vf_poly._rows])
+    ext = [[_make_rational(value) for value in row[1:]] for row in ext]
+    return Polytope._from_rows(vf_poly._coordinates,
+                               ext + [[-value for value in ext[i]]
+                                      for i in lin_set])
+
+def iter_vf_enumeration(data=[], backend=None):
+    """Perform vertex/facet enumeration, generating the vectors one at a time
+
+      :type `data`: an argument accepted by the
+        :class:`~murasyp.vectors.Polytope` constructor.
+
+    :returns: the vectors of :func:`vf_enumeration`, but created only when
+      they are needed, so that the enumeration can be stopped early and not
+      all of them need to be kept in memory; vectors spanning a linear
+      subspace are followed by their negation
+    :rtype: an iterator of :class:`~murasyp.vectors.Vector`
+
+    A result of :func:`vf_enumeration` that is cached is used (see
+    :mod:`murasyp.cache`), but results of this function are not cached.
+
+    >>> data = [{'a': 1, 'b': -1}, {'a': -1, 'b': 2}]
+    >>> vectors = iter_vf_enumeration(data)
+    >>> next(vectors) in vf_enumeration(data)
+    True
+    >>> set(vectors) < vf_enumeration(data)
+    True
+
     """
     vf_poly = Polytope(data)
-    coordinates = list(vf_poly.domain())
-    mat = Matrix(list([0] + [vector[x] for x in coordinates]
-                      for vector in vf_poly),
-                 number_type='fraction')
-    mat.rep_type = RepType.INEQUALITY
-    poly = Polyhedron(mat)
-    ext = poly.get_generators()
-    fv_poly = Polytope([{coordinates[j-1]: ext[i][j]
-                         for j in range(1, ext.col_size)}
-                        for i in range(0, ext.row_size)] +
-                       [{coordinates[j-1]: -ext[i][j]
-                         for j in range(1, ext.col_size)}
-                        for i in ext.lin_set])
-    return fv_poly
-
-def feasible(data, mapping=None):
+    cache = murasyp.cache.default_cache
+    if cache is not None:
+        polytope = cache.get(murasyp.cache.key(
+            'vf_enumeration', vf_poly, _backend_key(backend)))
+        if polytope is not None:
+            for vector in polytope:
+                yield vector
+            return
+    coordinates = vf_poly._coordinates
+    for row, linear in get_backend(backend).generate(
+            [(0,) + row for row in vf_poly._rows]):
+        values = [_make_rational(value) for value in row[1:]]
+        for values in [values, [-value for value in values]][:1 + linear]:
+            vector = Vector.__new__(Vector)
+            vector._mapping = dict(zip(coordinates, values))
+            yield vector
+
+def _columns(polytopes, coordinates):
+    """For each coordinate, the values of the vectors of the polytopes, one
+    polytope after the other, taken from their matrices"""
+    columns = [[] for x in coordinates]
+    for A in polytopes:
+        transposed = zip(*A._rows)
+        zeros = len(A) * (0,)
+        for x, column in zip(coordinates, columns):
+            j = A._index.get(x)
+            column.extend(zeros if j is None else transposed[j])
+    return columns
+
+def discard_redundant(data, backend=None):
+    """Find the redundant points of a polytope
+
+      :type `data`: a :class:`list` of arguments accepted by the
+        :class:`~murasyp.vectors.Vector` constructor.
+
+    :returns: the indices in `data` of points that are convex combinations of
+      the other points
+    :rtype: :class:`frozenset`
+
+    >>> sorted(discard_redundant([{'a': 1}, {'b': 1}, {'a': .5, 'b': .5}]))
+    [2]
+
+    """
+    vectors = [Vector(vector) for vector in data]
+    coordinates = list(frozenset().union(*(v.domain() for v in vectors)))
+    return get_backend(backend).redundant([[1] + [v[x] for x in coordinates]
+                                           for v in vectors])
+
+def in_cone(data, mapping, interior=False, backend=None):
+    """Check whether a vector lies in the cone generated by others
+
+      :type `data`: an argument accepted by the
+        :class:`~murasyp.vectors.Polytope` constructor.
+      :type `mapping`: an argument accepted by the
+        :class:`~murasyp.vectors.Vector` constructor.
+      :arg `interior`: whether to check membership of the relative interior
+        instead, i.e., of the set of strictly positive combinations
+      :type `interior`: :class:`bool`
+      :rtype: :class:`bool`
+
+    Cheap tests on the vectors' supports and signs are done before a linear
+    program is solved.
+
+    >>> in_cone([{'a': 1}, {'b': 1}], {'a': 1, 'b': 2})
+    True
+    >>> in_cone([{'a': 1}, {'b': 1}], {'a': 1}, interior=True)
+    False
+
+    """
+    vectors = Polytope(data)
+    vector = Vector(mapping)
+    if not interior and vector in vectors:
+        return True
+    if interior and vectors == Polytope([vector]):
+        return True
+    for x in vector.support():
+        if not any(v[x] * vector[x] > 0 for v in vectors):
+            return False
+    coordinates = list(vectors.domain() | vector.domain())
+    equalities = [[0 if interior else -vector[x]] + column
+                  + ([-vector[x]] if interior else [])
+                  for x, column in zip(coordinates,
+                                       _columns([vectors], coordinates))]
+    n = len(vectors) + (1 if interior else 0)
+    inequalities = [[-1 if interior else 0] + [int(k == m) for k in range(n)]
+                    for m in range(n)]
+    status, value, solution = get_backend(backend).maximize(
+        equalities, inequalities, [0] * (n + 1))
+    return status == 'optimal'
+
+def extreme_rays(data, backend=None):
+    """Remove the vectors that are nonnegative combinations of the others
+
+      :type `data`: an argument accepted by the
+        :class:`~murasyp.vectors.Polytope` constructor.
+      :returns: a subset of `data` that generates the same cone
+      :rtype: a :class:`~murasyp.vectors.Polytope`
+
+    >>> extreme_rays([{'a': 1}, {'b': 1}, {'a': 1, 'b': 1}])
+    Polytope([Vector({'a': 1}), Vector({'b': 1})])
+
+    """
+    vectors = set(Polytope(data))
+    if len(vectors) > 1:
+        vectors.discard(Vector({}))
+    for vector in sorted(vectors, key=lambda v: len(v.support()),
+                         reverse=True):
+        others = vectors - {vector}
+        if others and in_cone(others, vector, backend=backend):
+            vectors = others
+    return Polytope(vectors)
+
+def includes(data, subdata, backend=None):
+    """Check whether a cone's relative interior includes that of another
+
+      :type `data`: an argument accepted by the
+        :class:`~murasyp.vectors.Polytope` constructor.
+      :type `subdata`: an argument accepted by the
+        :class:`~murasyp.vectors.Polytope` constructor.
+      :rtype: :class:`bool`
+
+    This is the case if the vectors of `subdata` lie in the cone generated by
+    `data` and their sum lies in its relative interior.
+
+    >>> includes([{'a': 1}, {'b': 1}], [{'a': 2, 'b': 1}])
+    True
+    >>> includes([{'a': 1}, {'b': 1}], [{'a': 1}])
+    False
+
+    """
+    vectors = Polytope(data)
+    subvectors = Polytope(subdata)
+    if not subvectors.domain() <= vectors.domain():
+        return False
+    return (all(in_cone(vectors, v, backend=backend) for v in subvectors)
+            and in_cone(vectors, sum(subvectors, Vector({})), True, backend))
+
+def feasible(data, mapping=None, backend=None):
     """Check feasibility using the CONEstrip algorithm
 
       .. todo::
@@ -36,6 +566,7 @@ def feasible(data, mapping=None):
         document, test more and clean up
 
     """
+    backend = get_backend(backend)
     D = set(Polytope(A) for A in data)
     if (mapping == None) or all(mapping[x] != 0 for x in mapping):
         h = None
@@ -43,37 +574,35 @@ def feasible(data, mapping=None):
         h = Vector(mapping)
         D.add(Polytope({-h}))
     coordinates = list(frozenset.union(*(A.domain() for A in D)))
-    E = [[vector for vector in A] for A in D]
+    E = list(D)
     #print(E)
     while (E != []):
         k = len(E)
         L = [len(A) for A in E]
         l = sum(L)
-        mat = Matrix([[0] + l * [0] + k * [0]], number_type='fraction')
-        mat.extend([[0] + [v[x] for A in E for v in A] + k * [0]
-                    for x in coordinates],
-                   linear=True) # cone-constraints
-        mat.extend([[0] + [int(B == A and w == v) for B in E for w in B]
-                        + k * [0]
-                    for A in E for v in A]) # mu >= 0
-        mat.extend([[1] + l * [0] + [-int(B == A) for B in E]
-                    for A in E]) # tau <= 1
-        mat.extend([[0] + l * [0] + [int(B == A) for B in E]
-                    for A in E]) # tau >= 0
-        mat.extend([[-1] + l * [0] + k * [1]]) # (sum of tau_A) >= 1
-        mat.extend([[0] + [int(B == A and w == v) for B in E for w in B]
-                        + [-int(B == A) for B in E]
-                    for A in E for v in A]) # tau_A <= mu_A for all A
+        cone = [n for n in range(k) for m in range(L[n])] # of each mu entry
+        equalities = [[0] + column + k * [0]
+                      for column in _columns(E, coordinates)] # cone-constraints
+        inequalities = [[0] + l * [0] + k * [0]]
+        inequalities.extend([[0] + [int(m == i) for m in range(l)] + k * [0]
+                             for i in range(l)]) # mu >= 0
+        inequalities.extend([[1] + l * [0] + [-int(n == j) for n in range(k)]
+                             for j in range(k)]) # tau <= 1
+        inequalities.extend([[0] + l * [0] + [int(n == j) for n in range(k)]
+                             for j in range(k)]) # tau >= 0
+        inequalities.extend([[-1] + l * [0] + k * [1]]) # (sum of tau_A) >= 1
+        inequalities.extend([[0] + [int(m == i) for m in range(l)]
+                                 + [-int(n == cone[i]) for n in range(k)]
+                             for i in range(l)]) # tau_A <= mu_A for all A
         if h != None: # mu_{-h} >= 1
-            mat.extend([[-1] + [int(A == [-h]) for A in E for w in A]
-                             + k * [0]])
-        mat.obj_type = LPObjType.MAX
-        mat.obj_func = tuple([0] + l * [0] + k * [1]) # (constant, mu, tau)
-        #print(mat)
-        lp = LinProg(mat)
-        lp.solve()
-        if lp.status == LPStatusType.OPTIMAL:
-            sol = lp.primal_solution # (constant, mu, tau)
+            minus_h = [int(A == Polytope([-h])) for A in E]
+            inequalities.extend([[-1] + [minus_h[n] for n in cone]
+                                      + k * [0]])
+        objective = [0] + l * [0] + k * [1] # (constant, mu, tau)
+        status, value, sol = backend.maximize(equalities, inequalities,
+                                              objective)
+        if status == 'optimal':
+            # sol is (mu, tau)
             tau = sol[l:]
             #print(tau)
             mu = [sol[sum(L[0:n]):sum(L[0:n]) + L[n]] for n in range(0, k)]
@@ -82,7 +611,7 @@ def feasible(data, mapping=None):
             #print(E)
             if all(all(mu[n][m] == 0 for m in range(0, L[n]))
                    for n in range(0, k) if tau[n] == 0):
-                E = {Polytope(A) for A in E}
+                E = set(E)
                 #print(E)
                 if h != None:
                     E = E - {Polytope([-h])}
@@ -95,45 +624,111 @@ def feasible(data, mapping=None):
     else:
         return set()
 
-def maximize(data, mapping={}, objective=(0, {})):
-    """Maximization using the CONEstrip algorithm
-
-      .. todo::
-
-        document, test more and clean up
-
-    """
-    E = feasible(data, mapping)
+def _conestrip_system(E, objective):
+    """Coordinates, constraints and objective of the linear program of
+    :func:`maximize` over the cones E, with zero constants in the
+    cone-constraints"""
     if E == set():
         raise ValueError("The linear program is infeasible.")
         #print("The linear program is infeasible.")
         #return 0
     l = sum(len(A) for A in E)
-    h = Vector(mapping)
     goal = (objective[0], Vector(objective[1]))
     #print(goal)
     coordinates = list(frozenset.union(*(A.domain() for A in E)))
-    E = [[vector for vector in A] for A in E]
-    mat = Matrix([[0] + l * [0]], number_type='fraction')
-    mat.extend([[-h[x]] + [v[x] for A in E for v in A]
-                for x in coordinates], linear=True) # cone-constraints
-    mat.extend([[0] + [int(B == A and w == v) for B in E for w in B]
-                for A in E for v in A]) # mu >= 0
-    mat.obj_type = LPObjType.MAX
-    mat.obj_func = tuple([goal[0]] + [goal[1][v] for A in E for v in A])
-                      # (constant, mu)
-    #print(mat)
-    lp = LinProg(mat)
-    lp.solve()
-    if lp.status == LPStatusType.OPTIMAL:
-        #print(lp.primal_solution)
-        return lp.obj_value
-    elif lp.status == LPStatusType.UNDECIDED:
-        status = "undecided"
-    elif lp.status == LPStatusType.INCONSISTENT:
-        status = "inconsistent"
-    elif lp.status == LPStatusType.UNBOUNDED:
-        status = "unbounded"
-    else:
-        status = "of unknown status"
-    raise ValueError("The linear program is " + str(status) + '.')
+    E = list(E)
+    equalities = [[0] + column
+                  for column in _columns(E, coordinates)] # cone-constraints
+    inequalities = [[0] + l * [0]]
+    inequalities.extend([[0] + [int(m == i) for m in range(l)]
+                         for i in range(l)]) # mu >= 0
+    return (coordinates, equalities, inequalities,
+            [goal[0]] + ([goal[1][v] for A in E for v in A] if goal[1]
+                         else l * [0])) # (constant, mu)
+
+def _conestrip_lp(data, mapping, objective, backend):
+    """Constraints and objective of the linear program of :func:`maximize`
+    over the cones selected by :func:`feasible`"""
+    coordinates, equalities, inequalities, goal = _conestrip_system(
+        feasible(data, mapping, backend), objective)
+    h = Vector(mapping)
+    for x, row in zip(coordinates, equalities):
+        row[0] = -h[x]
+    return equalities, inequalities, goal
+
+def maximize(data, mapping={}, objective=(0, {}), backend=None):
+    """Maximization using the CONEstrip algorithm
+
+      .. todo::
+
+        document, test more and clean up
+
+    """
+    backend = get_backend(backend)
+    equalities, inequalities, goal = _conestrip_lp(data, mapping, objective,
+                                                   backend)
+    status, value, sol = backend.maximize(equalities, inequalities, goal)
+    if status == 'optimal':
+        return value
+    raise ValueError("The linear program is " + status + '.')
+
+def maximize_many(data, mappings, objective=(0, {}), backend=None):
+    """Maximization using the CONEstrip algorithm for a number of mappings
+
+      :type `mappings`: :class:`~collections.Iterable` of arguments accepted
+        by the :class:`~murasyp.vectors.Vector` constructor
+      :returns: the maxima of :func:`maximize` for each of the mappings
+      :rtype: :class:`list`
+
+    The cones selected by :func:`feasible` only depend on the mapping if it
+    has zero values, so they are shared by all other mappings, and the
+    linear programs over the same cones only differ in the constants of their
+    cone-constraints; they are passed to the backend together (see
+    :meth:`LPBackend.maximize_batch`).
+
+    """
+    backend = get_backend(backend)
+    data = set(Polytope(A) for A in data)
+    mappings = [Vector(mapping) for mapping in mappings]
+    groups = {} # selected cones -> indices of mappings
+    selected = {}
+    for i, h in enumerate(mappings):
+        key = None if all(h[x] != 0 for x in h) else h
+        if key not in selected:
+            selected[key] = frozenset(feasible(data, key, backend))
+        groups.setdefault(selected[key], []).append(i)
+    values = len(mappings) * [None]
+    for E, indices in groups.iteritems():
+        coordinates, equalities, inequalities, goal = _conestrip_system(
+            set(E), objective)
+        results = backend.maximize_batch(
+            equalities, inequalities, goal,
+            [[-mappings[i][x] for x in coordinates] for i in indices])
+        for i, (status, value, sol) in zip(indices, results):
+            if status != 'optimal':
+                raise ValueError("The linear program is " + status + '.')
+            values[i] = value
+    return values
+
+def reaches(data, mapping={}, objective=(0, {}), threshold=0, backend=None):
+    """Check whether the maximum of :func:`maximize` is at least a threshold
+
+      :type `threshold`: a representation of :class:`~numbers.Real`
+      :rtype: :class:`bool`
+
+    Instead of optimizing, the objective is bounded from below by the
+    threshold and only the feasibility of the resulting linear program is
+    checked.
+
+    """
+    backend = get_backend(backend)
+    equalities, inequalities, goal = _conestrip_lp(data, mapping, objective,
+                                                   backend)
+    inequalities.append([goal[0] - _make_rational(threshold)] + goal[1:])
+    status, value, sol = backend.maximize(equalities, inequalities,
+                                          [0] * len(goal))
+    if status in ('optimal', 'unbounded'):
+        return True
+    elif status == 'inconsistent':
+        return False
+    raise ValueError("The linear program is " + status + '.')
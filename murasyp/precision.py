@@ -0,0 +1,150 @@
+"""Denominators of assessments and results can be bounded by rounding outward.
+
+Exact calculations can produce rationals with huge denominators, which make
+later linear programs slower. If :data:`default_precision` is set to a
+:class:`Precision`, values are rounded to the nearest rationals with bounded
+denominators in the direction that keeps the answers valid bounds:
+
+* the values of the rays of cones stored in a
+  :class:`~murasyp.desirs.DesirSet` (also by
+  :meth:`~murasyp.desirs.DesirSet.set_lower_pr` and the like) are rounded
+  up, so that the rounded gambles are implied by the assessed ones and the
+  model only becomes less committal;
+* lower expectations of :class:`~murasyp.desirs.DesirSet` and
+  :class:`~murasyp.credalsets.CredalSet` are rounded down and upper
+  expectations up.
+
+Lower expectations therefore only get lower and upper expectations higher.
+The largest rounding errors are kept by the :class:`Precision`.
+
+>>> import murasyp.precision
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.desirs import DesirSet
+>>> precision = murasyp.precision.default_precision = Precision(100)
+>>> D = DesirSet(['abc'])
+>>> D.set_lower_pr({'a': 1, 'b': 0, 'c': 1}, '1/3')
+>>> D.set_upper_pr({'a': 1, 'b': 0, 'c': 0}, '200/301')
+>>> f = Gamble({'a': 1, 'b': 0, 'c': 0})
+>>> D * f, D ** f
+(Fraction(0, 1), Fraction(2, 3))
+>>> precision.max_errors['assessments']
+Fraction(1, 200)
+
+The assessment of the upper probability is stored as the ray
+``{'a': '-101/200', 'b': 1, 'c': 1}`` rounded up to
+``{'a': '-1/2', 'b': 1, 'c': 1}``, so that the upper probability becomes
+``2/3``, which is larger than ``200/301``.
+
+>>> murasyp.precision.default_precision = None
+
+Values of cones stored before :data:`default_precision` was set are not
+rounded.
+
+"""
+
+import threading
+from fractions import Fraction
+from murasyp import _Rational, _make_rational, _as_fraction
+
+default_precision = None # the Precision that is used, if any
+
+class Precision(object):
+    """Outward rounding to rationals with bounded denominators
+
+      :arg `max_denominator`: the largest denominator of rounded values
+      :type `max_denominator`: :class:`int`
+
+    >>> precision = Precision(10)
+    >>> precision.down('7/22'), precision.up('7/22')
+    (Fraction(3, 10), Fraction(1, 3))
+    >>> precision.down(-.75), precision.up(-.75)
+    (Fraction(-3, 4), Fraction(-3, 4))
+    >>> precision.max_error
+    Fraction(1, 55)
+
+    The attribute :attr:`max_errors` maps the kinds of values rounded, such
+    as ``'assessments'`` and ``'expectations'``, to the largest rounding
+    error for them, and :attr:`max_error` is the largest of these.
+
+    """
+
+    def __init__(self, max_denominator=10 ** 6):
+        """Create a precision"""
+        if max_denominator < 1:
+            raise ValueError("the largest denominator must be positive")
+        self.max_denominator = max_denominator
+        self.max_errors = {}
+        self._lock = threading.Lock()
+
+    @property
+    def max_error(self):
+        """The largest rounding error so far"""
+        return max(self.max_errors.values() or [Fraction(0)])
+
+    def down(self, value, kind='values'):
+        """The largest rational with a bounded denominator that is at most
+        the value
+
+          :type `value`: a representation of :class:`~numbers.Real`
+          :arg `kind`: the kind of value, under which its error is kept
+          :type `kind`: :class:`str`
+          :rtype: :class:`~fractions.Fraction`
+
+        """
+        return self._round(value, kind, 0)
+
+    def up(self, value, kind='values'):
+        """The smallest rational with a bounded denominator that is at least
+        the value
+
+          :type `value`: a representation of :class:`~numbers.Real`
+          :arg `kind`: the kind of value, under which its error is kept
+          :type `kind`: :class:`str`
+          :rtype: :class:`~fractions.Fraction`
+
+        """
+        return self._round(value, kind, 1)
+
+    def _round(self, value, kind, side):
+        value = _make_rational(value)
+        if value.denominator <= self.max_denominator:
+            return _as_fraction(value)
+        rounded = _neighbours(value, self.max_denominator)[side]
+        error = abs(rounded - value)
+        with self._lock:
+            if error > self.max_errors.get(kind, 0):
+                self.max_errors[kind] = _as_fraction(error)
+        return _as_fraction(rounded)
+
+
+def _neighbours(value, max_denominator):
+    """The rationals with denominators up to the maximum that are closest
+    below and above a value with a larger denominator
+
+    These are neighbours in the Farey sequence, so no such rational lies
+    between them; they are found as by
+    :meth:`fractions.Fraction.limit_denominator`.
+
+    """
+    n, d = int(value.numerator), int(value.denominator)
+    p0, q0, p1, q1 = 0, 1, 1, 0
+    while True:
+        a = n // d
+        q2 = q0 + a * q1
+        if q2 > max_denominator:
+            break
+        p0, q0, p1, q1 = p1, q1, p0 + a * p1, q2
+        n, d = d, n - a * d
+    k = (max_denominator - q0) // q1
+    return tuple(sorted([_Rational(p0 + k * p1, q0 + k * q1),
+                         _Rational(p1, q1)]))
+
+def down(value, kind='expectations'):
+    """A value rounded down by :data:`default_precision`, if it is set"""
+    precision = default_precision
+    return value if precision is None else precision.down(value, kind)
+
+def up(value, kind='expectations'):
+    """A value rounded up by :data:`default_precision`, if it is set"""
+    precision = default_precision
+    return value if precision is None else precision.up(value, kind)
@@ -0,0 +1,317 @@
+"""Lower and upper expectations are calculated without blocking the caller.
+
+Each query immediately returns a :class:`Query`, which can be waited on,
+polled, given callbacks, or cancelled. The calculations themselves run in
+separate worker processes, at most a given number at a time; a calculation
+that is no longer waited for is abandoned by terminating its process, so even
+a long-running linear program does not keep going after its deadline or after
+it is cancelled. Identical concurrent queries share a single calculation.
+
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.desirs import DesirSet
+>>> D = DesirSet([[Gamble({'a': -1, 'c': '7/90'}),
+...                Gamble({'a': 1, 'c': '-1/30'}),
+...                Gamble({'a': -1, 'c': '1/9', 'b': -1}),
+...                Gamble({'a': 1, 'c': '-1/9', 'b': 1})]])
+>>> f = Gamble({'a': -1, 'b': 1, 'c': 0})
+>>> service = QueryService(D, workers=2)
+>>> service.lower(f, timeout=60).result()
+Fraction(-1, 25)
+>>> service.upper(f).result()
+Fraction(1, 25)
+>>> service.lower(f, timeout=0).result()
+Traceback (most recent call last):
+  ...
+Timeout: the query did not finish before its deadline
+>>> query = service.lower(-f)
+>>> query.cancel()
+True
+>>> query.result()
+Traceback (most recent call last):
+  ...
+Cancelled: the query was cancelled
+>>> service.close()
+
+"""
+
+import multiprocessing
+import threading
+import time
+from Queue import Queue
+from murasyp.gambles import Gamble
+
+class Cancelled(Exception):
+    """Raised when the result of a cancelled query is asked for"""
+
+
+class Timeout(Exception):
+    """Raised when the result of a query past its deadline is asked for"""
+
+
+class Query(object):
+    """The pending result of a lower or upper expectation query
+
+    Queries are created by :class:`QueryService`.
+
+    """
+
+    def __init__(self, solve, deadline):
+        """Create a query for a (possibly shared) calculation"""
+        self._solve = solve
+        self._deadline = deadline
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._outcome = None
+        self._callbacks = []
+
+    def done(self):
+        """Check whether the query has a result, an error, or was cancelled
+
+          :rtype: :class:`bool`
+
+        """
+        return self._done.is_set()
+
+    def _finish(self, outcome):
+        with self._lock:
+            if self.done():
+                return False
+            self._outcome = outcome
+            self._done.set()
+        for callback in self._callbacks:
+            callback(self)
+        return True
+
+    def cancel(self):
+        """Cancel the query
+
+          :returns: whether the query was still pending
+          :rtype: :class:`bool`
+
+        The shared calculation is abandoned once no query waits for it.
+
+        """
+        return self._finish((False, Cancelled("the query was cancelled")))
+
+    def _expire(self):
+        if self._deadline is not None and time.time() >= self._deadline:
+            self._finish((False, Timeout("the query did not finish "
+                                         "before its deadline")))
+
+    def result(self, timeout=None):
+        """The result of the query, waiting for it if necessary
+
+          :arg `timeout`: the maximal number of seconds to wait, which
+            defaults to waiting until the query's deadline
+          :type `timeout`: a representation of :class:`~numbers.Real`
+          :returns: the lower or upper expectation
+          :rtype: :class:`~fractions.Fraction`
+
+        :class:`Cancelled` or :class:`Timeout` is raised if the query was
+        cancelled or passed its deadline, and errors raised by the calculation
+        are raised again.
+
+        """
+        if timeout is None and self._deadline is not None:
+            timeout = max(0, self._deadline - time.time())
+        self._done.wait(timeout)
+        self._expire()
+        if not self.done():
+            raise Timeout("the query did not finish within the wait time")
+        success, value = self._outcome
+        if success:
+            return value
+        else:
+            raise value
+
+    def add_done_callback(self, callback):
+        """Call a function with the query as argument once it is done
+
+        This allows event loops to be notified, e.g., an :mod:`asyncio`
+        future can be resolved from the callback using the loop's
+        ``call_soon_threadsafe``.
+
+        """
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+
+class _Solve(object):
+    """A calculation shared by identical queries"""
+
+    def __init__(self, key):
+        self.key = key
+        self.lock = threading.RLock()
+        self.queries = []
+        self.closed = False
+
+    def attach(self, query):
+        """Attach a query, unless the calculation is closed"""
+        with self.lock:
+            if not self.closed:
+                self.queries.append(query)
+                return True
+        return False
+
+    def close_if_unwanted(self):
+        """Close the calculation if no query waits for it anymore"""
+        with self.lock:
+            queries = list(self.queries)
+        for query in queries:
+            query._expire()
+        with self.lock:
+            if all(query.done() for query in self.queries):
+                self.closed = True
+            return self.closed
+
+    def finish(self, outcome):
+        """Close the calculation and pass its outcome to the queries"""
+        with self.lock:
+            self.closed = True
+            queries = list(self.queries)
+        for query in queries:
+            query._finish(outcome)
+
+
+def _calculate(key, connection):
+    """Calculate in a worker process and send back the outcome"""
+    kind, gamble, model = key[:3]
+    try:
+        connection.send((True, model * gamble if kind == 'lower'
+                                              else model ** gamble))
+    except Exception as error:
+        connection.send((False, error))
+    connection.close()
+
+
+class QueryService(object):
+    """Non-blocking lower and upper expectations of a model
+
+      :arg `model`: an uncertainty model supporting the ``*`` and ``**``
+        operators, such as a :class:`~murasyp.desirs.DesirSet` or a
+        :class:`~murasyp.credalsets.CredalSet`
+      :arg `workers`: the maximal number of calculations running at the same
+        time
+      :type `workers`: :class:`int`
+
+    Models that can be frozen, such as those mentioned, are frozen when a
+    query is made (see :meth:`~murasyp.desirs.DesirSet.freeze`), so that
+    they can be changed meanwhile and each query is answered for the model as
+    it was when it was made; other models should not be changed while
+    queries are pending. Pending queries are only shared by queries made
+    for the same elements, backend and symmetry of the model:
+
+    >>> from murasyp.gambles import Gamble
+    >>> from murasyp.desirs import DesirSet
+    >>> D = DesirSet(['ab'])
+    >>> f = Gamble({'a': 1, 'b': 2})
+    >>> service = QueryService(D, workers=0) # the queries stay pending
+    >>> first = service.lower(f)
+    >>> D.backend = 'cdd-float'
+    >>> second, third = service.lower(f), service.lower(f)
+    >>> first._solve is second._solve, second._solve is third._solve
+    (False, True)
+    >>> first.cancel(), second.cancel(), third.cancel()
+    (True, True, True)
+
+    """
+    poll_interval = .05
+
+    def __init__(self, model, workers=2):
+        """Start the worker slots"""
+        self._model = model
+        self._queue = Queue()
+        self._solves = {}
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+    def _submit(self, kind, gamble, timeout):
+        model = self._model
+        if hasattr(model, 'freeze'):
+            model = model.freeze()
+        # snapshots are equal whatever their backend and symmetry
+        key = (kind, Gamble(gamble), model, getattr(model, 'backend', None),
+               getattr(model, 'symmetry', None))
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            solve = self._solves.get(key)
+            if solve is not None:
+                query = Query(solve, deadline)
+                if solve.attach(query):
+                    return query
+            solve = self._solves[key] = _Solve(key)
+            query = Query(solve, deadline)
+            solve.attach(query)
+            self._queue.put(solve)
+        return query
+
+    def lower(self, gamble, timeout=None):
+        """Query the lower expectation of a gamble
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :arg `timeout`: the number of seconds after which the query is
+            abandoned
+          :type `timeout`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`Query`
+
+        """
+        return self._submit('lower', gamble, timeout)
+
+    def upper(self, gamble, timeout=None):
+        """Query the upper expectation of a gamble
+
+          :type `gamble`: :class:`~murasyp.gambles.Gamble`
+          :arg `timeout`: the number of seconds after which the query is
+            abandoned
+          :type `timeout`: a representation of :class:`~numbers.Real`
+          :rtype: :class:`Query`
+
+        """
+        return self._submit('upper', gamble, timeout)
+
+    def _work(self):
+        while True:
+            solve = self._queue.get()
+            if solve is None:
+                return
+            if not solve.close_if_unwanted():
+                outcome = self._run(solve)
+                if outcome is not None:
+                    solve.finish(outcome)
+            with self._lock:
+                if self._solves.get(solve.key) is solve:
+                    del self._solves[solve.key]
+
+    def _run(self, solve):
+        """Run a calculation in a process; ``None`` if it is abandoned"""
+        receiver, sender = multiprocessing.Pipe(False)
+        process = multiprocessing.Process(target=_calculate,
+                                          args=(solve.key, sender))
+        process.daemon = True
+        process.start()
+        sender.close()
+        try:
+            while not receiver.poll(self.poll_interval):
+                if solve.close_if_unwanted():
+                    process.terminate()
+                    return None
+                if not process.is_alive() and not receiver.poll():
+                    return (False, RuntimeError("the worker process died"))
+            return receiver.recv()
+        finally:
+            process.join()
+            receiver.close()
+
+    def close(self):
+        """Stop the worker slots after the pending calculations"""
+        for thread in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,364 @@
+"""Models are kept loaded by a local query server.
+
+A :class:`QueryServer` answers lower and upper expectation queries over HTTP
+for named models, which are loaded, and frozen (see
+:meth:`~murasyp.desirs.DesirSet.freeze`), once. Requests and responses are
+JSON, as in :mod:`murasyp.cli`:
+
+=========================== ================================================
+``GET /models``             the names of the loaded models
+``PUT /models/<name>``      load the model in the request body
+``DELETE /models/<name>``   unload a model
+``POST /models/<name>/lower`` the lower expectation of the gamble in the
+                            request body, or of each gamble if it is a list
+``POST /models/<name>/upper`` idem, for upper expectations
+``GET /stats``              the statistics of each model
+=========================== ================================================
+
+Each model has a queue of requests. The requests that arrive within
+:attr:`~QueryServer.window` seconds of the first one waiting are answered
+together, up to :attr:`~QueryServer.max_batch` gambles at a time, so that
+the linear programs of their gambles are set up once (see
+:func:`~murasyp.cli.expectations`). The statistics of a model are the
+number of requests, gambles and batches, the current and largest number of
+waiting requests, and the mean and largest latency, i.e., the time between
+the arrival of a request and its answer, in seconds.
+
+>>> import httplib, json, threading
+>>> from murasyp.desirs import DesirSet
+>>> server = QueryServer({'D': DesirSet(['abc'])}, window=.05)
+>>> thread = threading.Thread(target=server.serve_forever)
+>>> thread.start()
+>>> def request(method, path, data=None):
+...     connection = httplib.HTTPConnection(*server.server_address)
+...     connection.request(method, path, json.dumps(data))
+...     response = connection.getresponse()
+...     return response.status, response.read()
+>>> request('POST', '/models/D/lower', {'a': 1, 'b': 2, 'c': 3})
+(200, '{"lower": 1}')
+>>> request('POST', '/models/D/upper', [{'a': 1, 'b': 2}, {'a': 'x'}])
+(200, '[{"upper": 2}, {"error": "\\\\"x\\\\" is not a rational number"}]')
+>>> request('PUT', '/models/K', {'credal': [{'a': .5, 'b': .5}, {'a': 1}]})
+(200, '{"loaded": "K"}')
+>>> request('GET', '/models')
+(200, '["D", "K"]')
+>>> request('PUT', '/models/L', {'credal': [5]})
+(400, '{"error": "a mass function is an object mapping states to numbers"}')
+>>> request('POST', '/models/L/lower', {'a': 1})
+(404, '{"error": "there is no model L"}')
+>>> clients = [threading.Thread(target=request, args=('POST',
+...                '/models/K/lower', {'a': i, 'b': -i})) for i in range(8)]
+>>> for client in clients:
+...     client.start()
+>>> for client in clients:
+...     client.join()
+>>> statistics = json.loads(request('GET', '/stats')[1])['K']
+>>> statistics['requests'], statistics['gambles'], statistics['queued']
+(8, 8, 0)
+>>> statistics['batches'] < 8
+True
+>>> server.shutdown()
+>>> thread.join()
+>>> server.server_close()
+
+Only local clients are expected: the server listens on the loopback
+interface by default and does not authenticate requests.
+
+"""
+
+import json
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from murasyp.cli import load_model, expectations, _gamble
+
+class _Request(object):
+    """A request waiting in the queue of a model"""
+
+    def __init__(self, queries):
+        self.queries = queries
+        self.arrival = time.time()
+        self.answered = threading.Event()
+        self.results = None
+
+
+class _Batcher(object):
+    """The queue of requests for a model, answered in batches by a thread"""
+
+    def __init__(self, model, window, max_batch):
+        """Freeze the model and start the thread"""
+        self.model = model.freeze() if hasattr(model, 'freeze') else model
+        self.window = window
+        self.max_batch = max_batch
+        self._waiting = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._statistics = dict(requests=0, gambles=0, batches=0,
+                                largest_batch=0, max_queued=0,
+                                total_latency=0., max_latency=0.)
+        self._thread = threading.Thread(target=self._work)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def answer(self, queries):
+        """The results of a request, waiting for its batch to be answered"""
+        request = _Request(queries)
+        with self._condition:
+            if self._closed:
+                raise KeyError("the model was unloaded")
+            self._waiting.append(request)
+            self._statistics['max_queued'] = max(
+                self._statistics['max_queued'], len(self._waiting))
+            self._condition.notify()
+        request.answered.wait()
+        return request.results
+
+    def _size(self):
+        return sum(len(request.queries) for request in self._waiting)
+
+    def _next_batch(self):
+        """The requests of the next batch, or ``None`` once closed"""
+        with self._condition:
+            while self._waiting == [] and not self._closed:
+                self._condition.wait()
+            if self._waiting == []:
+                return None
+            end = self._waiting[0].arrival + self.window
+            while self._size() < self.max_batch and not self._closed:
+                remaining = end - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            size = 0
+            for count, request in enumerate(self._waiting):
+                if count > 0 and size + len(request.queries) > self.max_batch:
+                    break
+                size += len(request.queries)
+            else:
+                count = len(self._waiting)
+            batch, self._waiting = self._waiting[:count], self._waiting[count:]
+            return batch
+
+    def _work(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            queries = [query for request in batch for query in request.queries]
+            results = expectations(self.model, queries)
+            now = time.time()
+            with self._condition:
+                statistics = self._statistics
+                statistics['batches'] += 1
+                statistics['largest_batch'] = max(statistics['largest_batch'],
+                                                  len(queries))
+                for request in batch:
+                    latency = now - request.arrival
+                    statistics['requests'] += 1
+                    statistics['gambles'] += len(request.queries)
+                    statistics['total_latency'] += latency
+                    statistics['max_latency'] = max(
+                        statistics['max_latency'], latency)
+            for request in batch:
+                request.results = results[:len(request.queries)]
+                results = results[len(request.queries):]
+                request.answered.set()
+
+    def statistics(self):
+        """The statistics of the queue"""
+        with self._condition:
+            statistics = dict(self._statistics)
+            statistics['queued'] = len(self._waiting)
+        total = statistics.pop('total_latency')
+        statistics['mean_latency'] = total / max(statistics['requests'], 1)
+        return statistics
+
+    def close(self):
+        """Stop the thread after answering the waiting requests"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Handle the requests to a :class:`QueryServer`"""
+
+    def _send(self, status, data):
+        body = json.dumps(data, sort_keys=True)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        return json.loads(self.rfile.read(
+                   int(self.headers.getheader('Content-Length', 0))))
+
+    def _path(self):
+        return [part for part in self.path.split('?')[0].split('/') if part]
+
+    def _handle(self, method):
+        path = self._path()
+        try:
+            status, data = method(path)
+        except KeyError as error:
+            status, data = 404, {'error': error.args[0]}
+        except ValueError as error:
+            status, data = 400, {'error': str(error)}
+        except Exception as error: # the client gets a response regardless
+            status, data = 500, {'error': str(error)}
+        self._send(status, data)
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_PUT(self):
+        self._handle(self._put)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def _get(self, path):
+        if path == ['models']:
+            return 200, sorted(self.server.models())
+        elif path == ['stats']:
+            return 200, self.server.statistics()
+        raise KeyError("there is no resource /" + '/'.join(path))
+
+    def _put(self, path):
+        if len(path) != 2 or path[0] != 'models':
+            raise KeyError("there is no resource /" + '/'.join(path))
+        self.server.load(path[1], load_model(self._body()))
+        return 200, {'loaded': path[1]}
+
+    def _delete(self, path):
+        if len(path) != 2 or path[0] != 'models':
+            raise KeyError("there is no resource /" + '/'.join(path))
+        self.server.unload(path[1])
+        return 200, {'unloaded': path[1]}
+
+    def _post(self, path):
+        if (len(path) != 3 or path[0] != 'models'
+                           or path[2] not in ('lower', 'upper')):
+            raise KeyError("there is no resource /" + '/'.join(path))
+        batcher = self.server._batcher(path[1])
+        data = self._body()
+        single = not isinstance(data, list)
+        results, queries, indices = [], [], []
+        for i, gamble in enumerate([data] if single else data):
+            try:
+                queries.append((path[2], _gamble(gamble)))
+                indices.append(i)
+                results.append(None)
+            except ValueError as error:
+                results.append({'error': str(error)})
+        if queries != []:
+            for i, result in zip(indices, batcher.answer(queries)):
+                results[i] = result
+        return 200, results[0] if single else results
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+class QueryServer(ThreadingMixIn, HTTPServer):
+    """An HTTP server answering queries for named models
+
+      :arg `models`: the initially loaded models, by name
+      :type `models`: :class:`dict` of
+        :class:`~murasyp.credalsets.CredalSet` or
+        :class:`~murasyp.desirs.DesirSet`
+      :arg `address`: the host and port to listen on, where port ``0`` picks
+        a free one; the actual address is :attr:`server_address`
+      :type `address`: :class:`tuple`
+      :arg `window`: the number of seconds requests wait for others to be
+        answered with
+      :type `window`: :class:`float`
+      :arg `max_batch`: the largest number of gambles answered together
+      :type `max_batch`: :class:`int`
+
+    The server is run by :meth:`serve_forever` and stopped from another
+    thread by :meth:`shutdown`, after which :meth:`server_close` unloads the
+    models.
+
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+    verbose = False # whether requests are logged to standard error
+
+    def __init__(self, models={}, address=('127.0.0.1', 0), window=.005,
+                 max_batch=256):
+        """Load the models and bind the server to its address"""
+        HTTPServer.__init__(self, address, _Handler)
+        self.window = window
+        self.max_batch = max_batch
+        self._batchers = {}
+        self._lock = threading.Lock()
+        for name, model in models.iteritems():
+            self.load(name, model)
+
+    def load(self, name, model):
+        """Load a model, replacing the one with the same name, if any
+
+          :type `name`: :class:`str`
+          :type `model`: :class:`~murasyp.credalsets.CredalSet` or
+            :class:`~murasyp.desirs.DesirSet`
+
+        """
+        batcher = _Batcher(model, self.window, self.max_batch)
+        with self._lock:
+            previous = self._batchers.get(name)
+            self._batchers[name] = batcher
+        if previous is not None:
+            previous.close()
+
+    def unload(self, name):
+        """Unload a model, after answering its waiting requests"""
+        with self._lock:
+            batcher = self._batchers.pop(name, None)
+        if batcher is None:
+            raise KeyError("there is no model " + name)
+        batcher.close()
+
+    def _batcher(self, name):
+        with self._lock:
+            if name not in self._batchers:
+                raise KeyError("there is no model " + name)
+            return self._batchers[name]
+
+    def models(self):
+        """The names of the loaded models
+
+          :rtype: :class:`list` of :class:`str`
+
+        """
+        with self._lock:
+            return list(self._batchers)
+
+    def statistics(self):
+        """The statistics of each model, as described above
+
+          :rtype: :class:`dict` of :class:`dict`
+
+        """
+        with self._lock:
+            batchers = dict(self._batchers)
+        return {name: batcher.statistics()
+                for name, batcher in batchers.iteritems()}
+
+    def server_close(self):
+        """Close the socket and unload the models"""
+        HTTPServer.server_close(self)
+        for name in self.models():
+            try:
+                self.unload(name)
+            except KeyError: # unloaded meanwhile
+                pass
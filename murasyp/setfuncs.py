@@ -0,0 +1,194 @@
+"""Set functions on the events of a finite possibility space
+
+Set functions are represented compactly as lists indexed by bitmask: the
+possibility space is given as a :class:`tuple` of states, and the event
+containing the states at the positions of the set bits of an integer ``mask``
+has value ``values[mask]``.
+
+>>> states = ('a', 'b', 'c')
+>>> event_mask(states, {'a', 'c'})
+5
+>>> sorted(mask_event(states, 5))
+['a', 'c']
+
+"""
+
+from murasyp import _make_rational, _as_fraction
+from murasyp.events import Event
+
+def event_mask(states, event):
+    """Bitmask of an event
+
+      :arg `states`: the states of the possibility space
+      :type `states`: :class:`tuple`
+      :arg `event`: the event
+      :type `event`: :class:`~collections.Set`
+      :returns: the integer whose set bits correspond to the states in `event`
+      :rtype: :class:`int`
+
+    The bitmask of an :class:`~murasyp.events.Event` of the same possibility
+    space is used as it is.
+
+    >>> event_mask(('a', 'b', 'c'), Event('abc', 'bc'))
+    6
+
+    """
+    if isinstance(event, Event) and event.states == states:
+        return event.mask
+    return sum(1 << i for i, x in enumerate(states) if x in event)
+
+def mask_event(states, mask):
+    """Event of a bitmask
+
+      :arg `states`: the states of the possibility space
+      :type `states`: :class:`tuple`
+      :arg `mask`: the bitmask
+      :type `mask`: :class:`int`
+      :returns: the event whose states correspond to the set bits of `mask`
+      :rtype: :class:`frozenset`
+
+    """
+    return frozenset(x for i, x in enumerate(states) if mask & (1 << i))
+
+def as_dict(states, values):
+    """Convert a compact set function to a dictionary keyed by events
+
+      :arg `states`: the states of the possibility space
+      :type `states`: :class:`tuple`
+      :arg `values`: the values of the set function, indexed by bitmask
+      :type `values`: :class:`list`
+      :rtype: :class:`dict` of :class:`frozenset` keys
+
+    >>> P = as_dict(('a', 'b'), [0, '1/3', 1, 1])
+    >>> P[frozenset(['a'])]
+    '1/3'
+
+    """
+    return {mask_event(states, mask): values[mask]
+            for mask in range(len(values))}
+
+def event_values(states, vector):
+    """Values of an additive set function for all events
+
+      :arg `states`: the states of the possibility space
+      :type `states`: :class:`tuple`
+      :arg `vector`: the values of the singletons
+      :type `vector`: :class:`~murasyp.vectors.Vector`
+      :returns: the sums of the singleton values over each event, indexed by
+        bitmask
+      :rtype: :class:`list`
+
+    Each value is obtained from an earlier one by adding a single singleton
+    value, so the total cost is linear in the number of events.
+
+    >>> from murasyp.massfuncs import PMFunc
+    >>> event_values(('a', 'b'), PMFunc({'a': .25, 'b': .75}))
+    [0, Fraction(1, 4), Fraction(3, 4), Fraction(1, 1)]
+
+    """
+    singletons = [vector._mapping.get(x, 0) for x in states]
+    values = [0] * (1 << len(states))
+    for mask in range(1, len(values)):
+        low = mask & -mask
+        values[mask] = values[mask ^ low] + singletons[low.bit_length() - 1]
+    return map(_as_fraction, values)
+
+def zeta(values):
+    """Zeta transform of a set function
+
+      :arg `values`: the values of the set function, indexed by bitmask
+      :type `values`: :class:`list`
+      :returns: the set function that maps each event to the sum of the
+        values of its subsets, indexed by bitmask
+      :rtype: :class:`list`
+
+    This is the fast subset-sum transform, whose cost is :math:`n2^n` for a
+    possibility space of :math:`n` states.
+
+    >>> zeta([0, '1/2', '1/4', '1/4'])
+    [Fraction(0, 1), Fraction(1, 2), Fraction(1, 4), Fraction(1, 1)]
+
+    """
+    values = [_make_rational(value) for value in values]
+    n = len(values).bit_length() - 1
+    for i in range(n):
+        bit = 1 << i
+        for mask in range(len(values)):
+            if mask & bit:
+                values[mask] += values[mask ^ bit]
+    return map(_as_fraction, values)
+
+def mobius(values):
+    """Moebius transform of a set function
+
+      :arg `values`: the values of the set function, indexed by bitmask
+      :type `values`: :class:`list`
+      :returns: the Moebius inverse of the set function, indexed by bitmask
+      :rtype: :class:`list`
+
+    This is the inverse of :func:`zeta`, with the same cost.
+
+    >>> mobius([0, '1/2', '1/4', 1])
+    [Fraction(0, 1), Fraction(1, 2), Fraction(1, 4), Fraction(1, 4)]
+
+    """
+    values = [_make_rational(value) for value in values]
+    n = len(values).bit_length() - 1
+    for i in range(n):
+        bit = 1 << i
+        for mask in range(len(values)):
+            if mask & bit:
+                values[mask] -= values[mask ^ bit]
+    return map(_as_fraction, values)
+
+def is_2monotone(values):
+    """Check whether a set function is 2-monotone
+
+      :arg `values`: the values of the set function, indexed by bitmask
+      :type `values`: :class:`list`
+      :rtype: :class:`bool`
+
+    It suffices to check :math:`P(A\cup\{x,y\})+P(A)\geq P(A\cup\{x\})+P(A\cup
+    \{y\})` for all events :math:`A` and states :math:`x`, :math:`y` outside
+    of it.
+
+    >>> is_2monotone([0, '1/4', '1/4', 1])
+    True
+    >>> is_2monotone([0, '1/2', '3/4', 1])
+    False
+
+    """
+    values = [_make_rational(value) for value in values]
+    n = len(values).bit_length() - 1
+    for mask in range(len(values)):
+        for i in range(n):
+            x = 1 << i
+            if mask & x:
+                continue
+            for j in range(i + 1, n):
+                y = 1 << j
+                if mask & y:
+                    continue
+                if (values[mask | x | y] + values[mask]
+                    < values[mask | x] + values[mask | y]):
+                    return False
+    return True
+
+def is_belief(values):
+    """Check whether a set function is a belief function
+
+      :arg `values`: the values of the set function, indexed by bitmask
+      :type `values`: :class:`list`
+      :rtype: :class:`bool`
+
+    A normalized set function is a belief function if and only if its Moebius
+    inverse is nonnegative.
+
+    >>> is_belief([0, '1/4', '1/4', 1])
+    True
+    >>> is_belief([0, '1/2', '3/4', 1])
+    False
+
+    """
+    masses = mobius(values)
+    return masses[0] == 0 and all(mass >= 0 for mass in masses)
@@ -0,0 +1,209 @@
+"""Permutations of the states under which a model is invariant reduce the size
+of its linear programs.
+
+If a set of desirable gambles is invariant under a group of permutations of
+its possibility space, then so is its natural extension, and the lower
+expectation of a gamble that is invariant as well is attained by an invariant
+mass function. Invariant mass functions and gambles are fully described by
+their values on the orbits of the group, so such lower expectations can be
+calculated on the possibility space of the orbits, using for each gamble of
+the model its averages over the orbits.
+
+>>> from murasyp.gambles import Gamble
+>>> from murasyp.desirs import DesirSet
+>>> D = DesirSet(['abcd'])
+>>> for x, y in ['ab', 'bc', 'cd', 'da']:
+...     D.set_lower_pr(Gamble({x: 1, y: 1}) | set('abcd'), '1/3')
+>>> f = Gamble({'a': 1, 'b': 1, 'c': 1, 'd': 0})
+>>> D * f
+Fraction(1, 3)
+>>> D.symmetry = Symmetry([{'a': 'c', 'c': 'a'}])
+>>> D * f
+Fraction(1, 3)
+>>> D.symmetry.reduce(f)
+Gamble({'a': 1, 'b': 1, 'd': 0})
+
+The domain of a gamble, i.e., its conditioning event, must be a union of
+orbits as well:
+
+>>> D = DesirSet(['abc'])
+>>> for x, p in [('a', '1/5'), ('b', '1/5'), ('c', '3/10')]:
+...     D.set_lower_pr(Gamble(x) | set('abc'), p)
+>>> f = Gamble({'a': 0, 'c': 1})
+>>> D * f, D ** f
+(Fraction(3, 8), Fraction(3, 4))
+>>> D.symmetry = Symmetry([{'a': 'b', 'b': 'a'}])
+>>> D * f, D ** f
+(Fraction(3, 8), Fraction(3, 4))
+
+Only gambles that are invariant are calculated on the orbits; others, and
+vertex enumeration, still use the whole possibility space, as the vertices of
+an invariant credal set are not determined by its invariant mass functions.
+
+"""
+
+from collections import Mapping
+from murasyp.vectors import Vector
+from murasyp.gambles import Gamble, Cone
+
+class Symmetry(object):
+    """A group of permutations of states, given by generators
+
+      :type `generators`: :class:`~collections.Iterable` of
+        :class:`~collections.Mapping` of states to states, each a permutation
+        of its keys; states that are not keys are left in place
+
+    >>> S = Symmetry([{'a': 'b', 'b': 'a'}, {'b': 'c', 'c': 'b'}])
+    >>> S.orbits(set('abcd'))
+    [frozenset(['a', 'c', 'b']), frozenset(['d'])]
+    >>> Symmetry([{'a': 'b'}])
+    Traceback (most recent call last):
+      ...
+    ValueError: {'a': 'b'} is not a permutation of its keys
+
+    """
+
+    def __init__(self, generators=[]):
+        """Create the group generated by the given permutations"""
+        self.generators = []
+        for generator in generators:
+            if (not isinstance(generator, Mapping)
+                or set(generator.itervalues()) != set(generator)):
+                raise ValueError(repr(generator) +
+                                 " is not a permutation of its keys")
+            self.generators.append({x: y for x, y in generator.iteritems()
+                                         if x != y})
+        self._orbit = {}
+        for generator in self.generators:
+            for x, y in generator.iteritems():
+                orbit = self._orbit.get(x, frozenset([x]))
+                other = self._orbit.get(y, frozenset([y]))
+                if orbit != other:
+                    for z in orbit | other:
+                        self._orbit[z] = orbit | other
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return type(self).__name__ + '(' + repr(self.generators) + ')'
+
+    def orbit(self, state):
+        """The states to which a state is mapped by the group
+
+          :rtype: :class:`frozenset`
+
+        """
+        return self._orbit.get(state, frozenset([state]))
+
+    def orbits(self, pspace):
+        """The orbits of a set of states that is invariant
+
+          :rtype: :class:`list` of :class:`frozenset`, sorted by their
+            smallest element
+
+        """
+        return sorted(set(self.orbit(x) for x in pspace), key=min)
+
+    def permute(self, vector, generator):
+        """Permute the states of a vector
+
+          :type `vector`: :class:`~murasyp.vectors.Vector`
+          :type `generator`: one of the :attr:`generators`
+          :returns: the vector of the same type with the value of each state
+            moved to its image
+          :rtype: :class:`~murasyp.vectors.Vector`
+
+        """
+        return type(vector)({generator.get(x, x): vector[x] for x in vector})
+
+    def is_invariant(self, data):
+        """Check whether a vector or set of cones is left in place
+
+          :type `data`: a :class:`~murasyp.vectors.Vector` or an
+            :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Cone`
+          :rtype: :class:`bool`
+
+        >>> S = Symmetry([{'a': 'b', 'b': 'a'}])
+        >>> S.is_invariant(Gamble({'a': 1, 'b': 1, 'c': 0}))
+        True
+        >>> S.is_invariant(Gamble({'a': 0, 'c': 1})) # conditional on {a, c}
+        False
+        >>> S.is_invariant([Cone(['a']), Cone(['b'])])
+        True
+        >>> S.is_invariant([Cone(['a'])])
+        False
+
+        """
+        if isinstance(data, Vector):
+            return all(y in data and data[x] == data[y]
+                       for x in data for y in self.orbit(x))
+        cones = set(data)
+        return all(Cone(self.permute(ray, generator) for ray in cone) in cones
+                   for generator in self.generators for cone in cones)
+
+    def reduce(self, vector):
+        """Average a vector over the orbits
+
+          :type `vector`: :class:`~murasyp.vectors.Vector`
+          :returns: the vector of the same type on the orbits, each represented
+            by its smallest state, with the average values over the orbits
+            (states outside of the domain count as zero)
+          :rtype: :class:`~murasyp.vectors.Vector`
+
+        """
+        sums = {}
+        for x in vector:
+            orbit = self.orbit(x)
+            sums[min(orbit)] = sums.get(min(orbit), 0) + vector[x]
+        return type(vector)({x: value / len(self.orbit(x))
+                             for x, value in sums.iteritems()})
+
+    def reduce_cones(self, cones):
+        """Average the rays of cones over the orbits
+
+          :type `cones`: :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Cone`
+          :rtype: :class:`set` of :class:`~murasyp.gambles.Cone`
+
+        """
+        return set(Cone(self.reduce(ray) for ray in cone) for cone in cones)
+
+    @classmethod
+    def detect(cls, cones):
+        """Find the transpositions of states under which cones are invariant
+
+          :type `cones`: :class:`~collections.Iterable` of
+            :class:`~murasyp.gambles.Cone`, such as a
+            :class:`~murasyp.desirs.DesirSet`
+          :returns: the group generated by the transpositions of two states
+            that leave the set of cones in place
+          :rtype: :class:`~murasyp.symmetry.Symmetry`
+
+        Only states with the same multiset of values in the rays are compared,
+        and none that are already in the same orbit. The detected group thus
+        permutes the states of each orbit arbitrarily; other symmetries, such
+        as cyclic ones, need to be declared.
+
+        >>> from murasyp.desirs import DesirSet
+        >>> D = DesirSet(['abc'])
+        >>> D.set_lower_pr({'a': 1, 'b': 1, 'c': 0}, .5)
+        >>> Symmetry.detect(D).orbits(D.pspace())
+        [frozenset(['a', 'b']), frozenset(['c'])]
+
+        """
+        cones = set(cones)
+        rays = [ray for cone in cones for ray in cone]
+        pspace = frozenset().union(*(cone.domain() for cone in cones))
+        signatures = {}
+        for x in pspace:
+            signature = tuple(sorted((ray[x], x in ray) for ray in rays))
+            signatures.setdefault(signature, []).append(x)
+        symmetry = cls()
+        for states in signatures.itervalues():
+            for i, x in enumerate(states):
+                for y in states[i + 1:]:
+                    if y in symmetry.orbit(x):
+                        continue
+                    if cls([{x: y, y: x}]).is_invariant(cones):
+                        symmetry = cls(symmetry.generators + [{x: y, y: x}])
+        return symmetry
@@ -1,4 +1,5 @@
 from collections import Set, Hashable, Mapping
+from murasyp import _make_rational, _canonical_rational, _as_fraction
 from murasyp.functions import Function
 
 class Vector(Function, Hashable):
@@ -44,11 +45,105 @@ class Vector(Function, Hashable):
       >>> f | {'a','d'}
       Vector({'a': '11/10', 'd': 0})
 
+    * In sparse mode, only nonzero values are stored and the domain is kept as
+      a separate object that is shared by the results of arithmetic, so that
+      pointwise operations only cost time and memory proportional to the number
+      of nonzero values. Sparse vectors are equal to their dense counterparts
+      and any result involving a sparse vector is sparse.
+
+      >>> f = Vector({'a': 1.1, 'b': '-1/2','c': 0}).sparse()
+      >>> g = Vector({'b': '.5', 'c': -2, 'd': 0.0})
+      >>> h = f + g
+      >>> h
+      Vector({'a': '11/10', 'c': -2, 'b': 0, 'd': 0})
+      >>> h.is_sparse(), h.support()
+      (True, frozenset(['a', 'c']))
+      >>> h == h.dense()
+      True
+
     """
 
-    __getitem__ = lambda self, x: self._mapping[x] if x in self else 0
-    __hash__ = lambda self: hash(tuple(item for item
-                                            in self._mapping.iteritems()))
+    _domain = None # only set for sparse vectors
+
+    __len__ = lambda self: len(self._mapping if self._domain is None
+                                             else self._domain)
+    __iter__ = lambda self: iter(self._mapping if self._domain is None
+                                               else self._domain)
+    __contains__ = lambda self, x: x in (self._mapping if self._domain is None
+                                                       else self._domain)
+    __getitem__ = lambda self, x: _as_fraction(self._mapping.get(x, 0))
+
+    def __hash__(self):
+        """Hash, which is the same for sparse and dense vectors, whatever the
+        internally used rational type, and whatever the order of the values"""
+        if self._domain is None:
+            return hash(tuple(sorted((x, _as_fraction(val))
+                                     for x, val in self._mapping.iteritems())))
+        else:
+            return hash(self.dense())
+
+    def __eq__(self, other):
+        """Equality, comparing the stored values directly"""
+        if isinstance(other, Vector):
+            return self.dense()._mapping == other.dense()._mapping
+        else:
+            return Function.__eq__(self, other)
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return Function.__repr__(self.dense())
+
+    __str__ = lambda self: str(dict(self.dense().iteritems()))
+
+    @classmethod
+    def _from_sparse(cls, values, domain):
+        """Create a sparse vector from its nonzero values and its domain"""
+        vector = cls.__new__(cls)
+        vector._mapping = values
+        vector._domain = domain
+        return vector
+
+    def is_sparse(self):
+        """Checks whether the vector is in sparse mode
+
+          :rtype: :class:`bool`
+
+        """
+        return self._domain is not None
+
+    def sparse(self):
+        """Sparse version of the vector
+
+          :returns: the vector, but storing only its nonzero values
+          :rtype: :class:`~murasyp.vectors.Vector`
+
+        >>> Vector({'a': 1, 'b': 0}).sparse()._mapping.keys()
+        ['a']
+
+        """
+        return self._from_sparse({x: val for x, val in self._mapping.iteritems()
+                                         if val != 0}, self.domain())
+
+    def dense(self):
+        """Dense version of the vector
+
+          :returns: the vector, but storing all its values
+          :rtype: :class:`~murasyp.vectors.Vector`
+
+        """
+        if self._domain is None:
+            return self
+        else:
+            return type(self)({x: self._mapping.get(x, 0)
+                               for x in self._domain})
+
+    def domain(self):
+        """Domain of the vector, shared between sparse vectors"""
+        return Function.domain(self) if self._domain is None else self._domain
+
+    def support(self):
+        """Support of the vector, i.e., where it is nonzero"""
+        return frozenset(x for x, val in self._mapping.iteritems() if val != 0)
 
     def _domain_joiner(self, other):
         if type(self) == type(other):
@@ -58,13 +153,104 @@ class Vector(Function, Hashable):
                             "types: '" + type(self).__name__ + "' and '"
                                        + type(other).__name__ + "'")
 
+    def _sparse_domain(self, other):
+        """The joint domain, for an operation with a sparse result"""
+        if type(self) != type(other):
+            self._domain_joiner(other) # raises the error
+        if self.domain() is other.domain() or self.domain() >= other.domain():
+            return self.domain()
+        elif other.domain() >= self.domain():
+            return other.domain()
+        else:
+            return self.domain() | other.domain()
+
+    def __add__(self, other):
+        """Pointwise addition of vectors"""
+        if self.is_sparse() or (isinstance(other, Vector) and other.is_sparse()):
+            domain = self._sparse_domain(other)
+            values = {x: val for x, val in self._mapping.iteritems()
+                             if val != 0}
+            for x, val in other._mapping.iteritems():
+                if val != 0:
+                    val += values.get(x, 0)
+                    if val == 0:
+                        del values[x]
+                    else:
+                        values[x] = val
+            return self._from_sparse(values, domain)
+        else:
+            return Function.__add__(self, other)
+
+    def __mul__(self, other):
+        """Scalar multiplication of vectors"""
+        if self.is_sparse():
+            other = _make_rational(other)
+            if other == 0:
+                return self._from_sparse({}, self._domain)
+            return self._from_sparse({x: val * other for x, val
+                                      in self._mapping.iteritems()},
+                                     self._domain)
+        else:
+            return Function.__mul__(self, other)
+
+    def __div__(self, other):
+        """Scalar division of vectors"""
+        if self.is_sparse():
+            other = _make_rational(other)
+            return self._from_sparse({x: val / other for x, val
+                                      in self._mapping.iteritems()},
+                                     self._domain)
+        else:
+            return Function.__div__(self, other)
+
+    __rmul__ = __mul__
+
     def __or__(self, other):
         """Restriction or extension with zero"""
         if isinstance(other, Set):
-            return type(self)({x: self[x] for x in other})
+            if self.is_sparse():
+                domain = other if isinstance(other, frozenset) \
+                               else frozenset(other)
+                return self._from_sparse({x: val for x, val
+                                          in self._mapping.iteritems()
+                                          if x in domain}, domain)
+            return type(self)({x: self._mapping.get(x, 0) for x in other})
         else:
             raise TypeError("the argument must be a Set")
 
+    def to_array(self, pspace, dtype=float):
+        """The values of the vector as a NumPy array
+
+          :arg `pspace`: the arguments, in the order of the array's elements
+          :type `pspace`: :class:`~collections.Sequence`
+          :arg `dtype`: the data type of the array; for ``object``, the
+            elements are :class:`~fractions.Fraction`
+          :rtype: :class:`numpy.ndarray`
+
+        >>> Vector({'a': 1, 'b': '1/2'}).to_array('abc').tolist()
+        [1.0, 0.5, 0.0]
+
+        """
+        return _to_array([self], pspace, dtype)[0]
+
+    @classmethod
+    def from_array(cls, pspace, values):
+        """Create a vector from an array of values
+
+          :arg `pspace`: the arguments, in the order of the array's elements
+          :type `pspace`: :class:`~collections.Sequence`
+          :arg `values`: the values
+          :type `values`: a one-dimensional :class:`numpy.ndarray` or
+            :class:`~collections.Sequence` of representations of
+            :class:`~numbers.Real`
+
+        >>> import numpy
+        >>> Vector.from_array('abc', numpy.array([1, .5, 0]))
+        Vector({'a': 1, 'c': 0, 'b': '1/2'})
+
+        """
+        return cls(dict(zip(pspace, _from_array(values))))
+
     def mass(self):
         """Sum of the values of the vector
 
@@ -75,7 +261,7 @@ class Vector(Function, Hashable):
         Fraction(1, 2)
 
         """
-        return sum(self._mapping.itervalues())
+        return _as_fraction(sum(self._mapping.itervalues()))
 
     def sum_normalized(self):
         """'Sum-of-values'-normalized version of the vector
@@ -113,7 +299,7 @@ class Vector(Function, Hashable):
         return all(val >= 0 for val in self._mapping.itervalues())
 
 
-class Polytope(frozenset):
+class Polytope(Set, Hashable):
     """A frozenset of vectors
 
       :type `data`: a non-:class:`~collections.Mapping`
@@ -123,27 +309,226 @@ class Polytope(frozenset):
       >>> Polytope([{'a': 2, 'b': 3}, {'b': 1, 'c': 4}])
       Polytope([Vector({'a': 2, 'b': 3}), Vector({'c': 4, 'b': 1})])
 
-    This class derives from :class:`~frozenset`, so its methods apply here as
-    well.
+    This class derives from :class:`~collections.Set`, so its methods apply
+    here as well; polytopes are equal to and hash like the :class:`frozenset`
+    of their vectors.
+
+    What has changed:
+
+    * The values of the vectors are stored as the rows of a matrix, with a
+      column per argument of the domain, and equal vectors are stored once.
+      The linear programs of :mod:`murasyp.mathprog` are set up from the
+      matrix directly.
 
-      .. todo::
+      >>> P = Polytope([{'a': 2, 'b': 3}, {'b': 1, 'c': 4}, {'b': 3, 'a': 2}])
+      >>> len(P), {'b': 1, 'c': 4} in P, Vector({'b': 1}) in P
+      (2, True, False)
 
-        test all set methods and fix, or elegantly deal with, broken ones
+    * The vectors are only created once they are iterated over, so that
+      polytopes that are calculated or unpickled cost no more than their
+      matrix until then.
+
+    * Union, intersection and differences, also by the methods named after
+      them, result in a polytope of the same type; the arguments of these
+      methods are converted to polytopes first.
+
+      >>> P | [{'c': 1}]
+      Polytope([Vector({'a': 2, 'b': 3}), Vector({'c': 4, 'b': 1}), Vector({'c': 1})])
+      >>> P.intersection([{'a': 2, 'b': 3}])
+      Polytope([Vector({'a': 2, 'b': 3})])
 
     Additional and changed methods:
 
     """
-    def __new__(cls, data=[]):
+
+    _element = Vector
+
+    def __init__(self, data=[]):
         """Create a polytope"""
         if isinstance(data, Mapping):
-            raise TypeError(str(cls) + " does not accept a mapping,"
+            raise TypeError(str(type(self)) + " does not accept a mapping,"
                             + " but you passed it " + str(data))
+        elif (isinstance(data, Polytope)
+              and issubclass(data._element, self._element)):
+            # the matrix is shared, as it is never changed
+            self._set(data._coordinates, data._rows, data._masks, data._keys,
+                      data._vectors if data._element is self._element
+                                    else None)
         else:
-            return frozenset.__new__(cls, (Vector(element) for element in data))
-
-    def __init__(self, data=[]): # only here for Sphinx to pick up the argument
-        """Initialize the polytope"""
-        pass
+            self._store(self._element(element) for element in data)
+
+    @classmethod
+    def _from_elements(cls, elements):
+        """Create a polytope of vectors of the element type without
+        converting them"""
+        polytope = cls.__new__(cls)
+        polytope._store(elements)
+        return polytope
+
+    @classmethod
+    def _from_rows(cls, coordinates, rows):
+        """Create a polytope from the rows of values of its vectors, which are
+        internally used rationals, on all of the coordinates"""
+        coordinates = tuple(coordinates) if rows else ()
+        mask = (1 << len(coordinates)) - 1
+        keys = {}
+        unique = []
+        for row in rows:
+            row = tuple(row)
+            if (mask, row) not in keys:
+                keys[mask, row] = len(unique)
+                unique.append(row)
+        polytope = cls.__new__(cls)
+        polytope._set(coordinates, unique, len(unique) * [mask], keys, None)
+        return polytope
+
+    def _store(self, elements):
+        """Store the values of vectors as rows, once for equal vectors"""
+        elements = list(elements)
+        index = {}
+        coordinates = []
+        for vector in elements:
+            for x in vector:
+                if x not in index:
+                    index[x] = len(coordinates)
+                    coordinates.append(x)
+        zero = _make_rational(0)
+        keys = {}
+        rows, masks, vectors = [], [], []
+        for vector in elements:
+            mapping = vector._mapping
+            row = tuple(mapping.get(x, zero) for x in coordinates)
+            mask = 0
+            for x in vector:
+                mask |= 1 << index[x]
+            if (mask, row) not in keys:
+                keys[mask, row] = len(rows)
+                rows.append(row)
+                masks.append(mask)
+                vectors.append(vector)
+        self._set(tuple(coordinates), rows, masks, keys, vectors)
+
+    def _set(self, coordinates, rows, masks, keys, vectors):
+        self._coordinates = coordinates # the union of the domains
+        self._index = {x: j for j, x in enumerate(coordinates)}
+        self._rows = rows # tuples of the values, zero outside of the domain
+        self._masks = masks # the domains, as bitmasks of the coordinates
+        self._keys = keys # (mask, row) -> its index
+        self._vectors = vectors # the vectors, once created
+        self._hash = None
+
+    def _vector(self, i):
+        """The vector of a row"""
+        vector = self._element.__new__(self._element)
+        row, mask = self._rows[i], self._masks[i]
+        vector._mapping = {x: row[j] for j, x in enumerate(self._coordinates)
+                                     if mask >> j & 1}
+        return vector
+
+    def _key(self, vector):
+        """The mask and row of a vector, or None if its domain is not
+        included in the coordinates"""
+        mask = 0
+        for x in vector:
+            j = self._index.get(x)
+            if j is None:
+                return None
+            mask |= 1 << j
+        zero = _make_rational(0)
+        return (mask, tuple(vector._mapping.get(x, zero)
+                            for x in self._coordinates))
+
+    @classmethod
+    def _from_iterable(cls, iterable):
+        """Results of set operations are polytopes of the same type"""
+        return cls(iterable)
+
+    __len__ = lambda self: len(self._rows)
+
+    def __iter__(self):
+        """Iterate over the vectors, in the order of the rows"""
+        if self._vectors is None:
+            self._vectors = [self._vector(i) for i in range(len(self._rows))]
+        return iter(self._vectors)
+
+    def __contains__(self, data):
+        """Membership, looking up the row of the vector"""
+        if isinstance(data, Mapping) and not isinstance(data, Vector):
+            data = self._element(data)
+        if not isinstance(data, Vector):
+            return False
+        key = self._key(data)
+        return key is not None and key in self._keys
+
+    def __hash__(self):
+        """Hash, which is that of the frozenset of the vectors"""
+        if self._hash is None:
+            coordinates = list(enumerate(self._coordinates))
+            # the hash of a vector is that of its sorted items
+            self._hash = hash(frozenset(
+                tuple(sorted((x, _as_fraction(row[j])) for j, x in coordinates
+                                                       if mask >> j & 1))
+                for row, mask in zip(self._rows, self._masks)))
+        return self._hash
+
+    def __repr__(self):
+        """Return a readable string representation"""
+        return type(self).__name__ + '(' + repr(list(self)) + ')'
+
+    def __reduce__(self):
+        """Pickle compactly, see :func:`_pack`"""
+        return (_unpickle_polytope, (type(self), _pack(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, Polytope):
+            return len(self) == len(other) and self <= other
+        return Set.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __le__(self, other):
+        if (isinstance(other, Polytope)
+            and other._coordinates == self._coordinates):
+            return all(key in other._keys for key in self._keys)
+        return Set.__le__(self, other)
+
+    def __ge__(self, other):
+        if isinstance(other, Polytope):
+            return other <= self
+        return Set.__ge__(self, other)
+
+    def __lt__(self, other):
+        return self <= other and self != other
+
+    def __gt__(self, other):
+        return self >= other and self != other
+
+    __rand__ = lambda self, other: frozenset(other) & frozenset(self)
+    __ror__ = lambda self, other: frozenset(other) | frozenset(self)
+    __rsub__ = lambda self, other: frozenset(other) - frozenset(self)
+    __rxor__ = lambda self, other: frozenset(other) ^ frozenset(self)
+
+    def union(self, *others):
+        """The polytope of the vectors of this and other polytopes"""
+        return reduce(type(self).__or__, map(type(self), others), self)
+
+    def intersection(self, *others):
+        """The polytope of the vectors in this and all other polytopes"""
+        return reduce(type(self).__and__, map(type(self), others), self)
+
+    def difference(self, *others):
+        """The polytope of the vectors in this and no other polytope"""
+        return reduce(type(self).__sub__, map(type(self), others), self)
+
+    def issubset(self, other):
+        """Check whether all vectors are in another polytope"""
+        return self <= type(self)(other)
+
+    def issuperset(self, other):
+        """Check whether all vectors of another polytope are in this one"""
+        return self >= type(self)(other)
 
     def domain(self):
         """The union of the domains of the element vectors
@@ -157,4 +542,96 @@ class Polytope(frozenset):
         frozenset(['a', 'c', 'b'])
 
         """
-        return frozenset.union(*(vector.domain() for vector in self))
+        if '_domain' not in self.__dict__:
+            self._domain = frozenset(self._coordinates)
+        return self._domain
+
+
+def _from_array(values):
+    """The elements of an array as rationals, in (nested) lists
+
+    Integer arrays are converted directly, float arrays by way of the
+    elements' string representation, just like by the constructors.
+
+    """
+    import numpy
+    values = numpy.asarray(values)
+    if values.ndim == 1:
+        return [_make_rational(value) for value in values.tolist()]
+    elif values.ndim == 2:
+        return [[_make_rational(value) for value in row]
+                for row in values.tolist()]
+    else:
+        raise ValueError("specify a one- or two-dimensional array, not one "
+                         "of shape " + str(values.shape))
+
+def _to_array(vectors, pspace, dtype=float):
+    """The values of vectors as the rows of a NumPy array"""
+    import numpy
+    rows = [[vector._mapping.get(x, 0) for x in pspace] for vector in vectors]
+    if numpy.dtype(dtype) == numpy.dtype(object):
+        array = numpy.empty((len(rows), len(pspace)), dtype=object)
+        for i, row in enumerate(rows):
+            array[i, :] = [_as_fraction(value) for value in row]
+        return array
+    else:
+        return numpy.array([[float(value) for value in row] for row in rows],
+                           dtype=dtype).reshape(len(rows), len(pspace))
+
+def _pack(vectors):
+    """Compact columnar representation of vectors for pickling
+
+      :type `vectors`: :class:`~collections.Iterable` of
+        :class:`~murasyp.vectors.Vector`
+      :returns: a table of the arguments that occur, the number of values of
+        each vector, and the argument indices, numerators and denominators of
+        all values
+      :rtype: :class:`tuple`
+
+    >>> _pack([Vector({'a': 1, 'b': .5}), Vector({'b': -2})])
+    (('a', 'b'), (2, 1), (0, 1, 1), (1, 1, -2), (1, 2, 1))
+
+    """
+    table = {}
+    args = []
+    lengths = []
+    indices = []
+    numerators = []
+    denominators = []
+    for vector in vectors:
+        lengths.append(len(vector._mapping))
+        for x, val in vector._mapping.iteritems():
+            if x not in table:
+                table[x] = len(args)
+                args.append(x)
+            indices.append(table[x])
+            numerators.append(int(val.numerator))
+            denominators.append(int(val.denominator))
+    return (tuple(args), tuple(lengths), tuple(indices), tuple(numerators),
+            tuple(denominators))
+
+def _unpack(cls, payload):
+    """Recreate the vectors packed by :func:`_pack`
+
+    The vectors' values are known to be canonical, so the constructor of `cls`
+    and the normalization of fractions are skipped.
+
+    >>> _unpack(Vector, (('a', 'b'), (2, 1), (0, 1, 1), (1, 1, -2), (1, 2, 1)))
+    [Vector({'a': 1, 'b': '1/2'}), Vector({'b': -2})]
+
+    """
+    args, lengths, indices, numerators, denominators = payload
+    vectors = []
+    begin = 0
+    for length in lengths:
+        vector = cls.__new__(cls)
+        vector._mapping = {args[indices[j]]:
+                               _canonical_rational(numerators[j],
+                                                   denominators[j])
+                           for j in range(begin, begin + length)}
+        vectors.append(vector)
+        begin += length
+    return vectors
+
+def _unpickle_polytope(cls, payload):
+    return cls._from_elements(_unpack(cls._element, payload))